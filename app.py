@@ -1,9 +1,14 @@
+import os
 from flask import Flask, request, make_response
 from app import create_app
+from app.sweeper import start_sweeper
 
 app = Flask(__name__, template_folder='templates')
 
 app = create_app()
 
 if __name__ == '__main__':
+    # the reloader runs this file twice; only the child it starts serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_sweeper(app)
     app.run(debug=True, host='0.0.0.0', use_reloader=True, port=5000)
\ No newline at end of file
@@ -5,15 +5,23 @@ from flask_login import LoginManager
 db = SQLAlchemy()
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config_object='config.Config'):
     app = Flask(__name__, template_folder='../templates')
 
     # Loading configuration 
-    app.config.from_object('config.Config')
+    app.config.from_object(config_object)
 
     # initialising extensions
     db.init_app(app)
     login_manager.init_app(app)
+
+    # SQLite PRAGMAs and optional read-only connection
+    from app.database import configure_engine
+    configure_engine(app)
+    
+    # opt-in per-endpoint query and render timings
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
     
     # configuring login manager
     login_manager.login_view = 'auth.login'
@@ -21,18 +29,40 @@ def create_app():
     
     # import models
     from app import models
+
+    # availability cache backend
+    from app.cache import cache
+    cache.init_app(app)
+
+    # cached per-lot cards on the dashboards
+    from app.fragments import init_fragments
+    init_fragments(app)
+
+    # cache used by the login manager's user loader
+    from app.user_cache import init_user_cache
+    init_user_cache(app)
+    
+    # password hashing off the request workers
+    from app.hashing import init_hashing
+    init_hashing(app)
     
     # import and register blueprints
     from app.routes import main as main_blueprint
     from app.routes import auth
     from app.admin import admin as admin_blueprint
     from app.user import user as user_blueprint
+    from app.api import api as api_blueprint
     
     
     app.register_blueprint(main_blueprint)
     app.register_blueprint(auth)
     app.register_blueprint(admin_blueprint)
     app.register_blueprint(user_blueprint)
+    app.register_blueprint(api_blueprint)
+
+    # CLI commands
+    from app.commands import register_commands
+    register_commands(app)
 
     return app
 
@@ -1,8 +1,27 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, Response, stream_with_context, jsonify, current_app
 from flask_login import login_required, current_user
 from app.models import db, ParkingLot, ParkingSpot, User, Reservation
+from app.availability import SPOT_STATUSES, get_lots_snapshot, lot_counts, mark_lots_changed
+from app.provisioning import add_spots, remove_spots
+from app.bulk import delete_spots as bulk_delete_spots, release_spots as bulk_release_spots, set_spots_status
+from app.database import execute_read
+from app.parking import close_reservation
+from app.events import event_bus, publish_after_commit
+from app.analytics import GROUPINGS, revenue_report
+from app.rollups import lot_occupancy
+from app.geo import mark_geo_changed
+from app.instrumentation import get_metrics, prometheus_text
+from app.cache import cache
+from app.user_cache import user_cache
+from sqlalchemy import and_, exists, or_, select
+from sqlalchemy.orm import aliased, contains_eager, joinedload
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
+import csv
+import hmac
+import io
+import json
+import queue
 
 admin = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -21,18 +40,8 @@ def admin_required(f):
 @login_required
 @admin_required
 def dashboard():
-    lots = ParkingLot.query.order_by(ParkingLot.id).all()
-    
-    lots_data = []
-    for lot in lots:
-        occupied_spots = ParkingSpot.query.filter_by(lot_id=lot.id, status='O').count()
-        lots_data.append({
-            'details': lot,
-            'occupied_spots': occupied_spots,
-            'total_spots': lot.max_spots
-        })
-        
-    return render_template('admin/dashboard.html', lots_data=lots_data)
+    lots = get_lots_snapshot()
+    return render_template('admin/dashboard.html', lots=lots)
 
 # New parking lot
 @admin.route('/lots/create', methods=['GET', 'POST'])
@@ -50,13 +59,18 @@ def create_lot():
             price_per_hour=float(request.form['price_per_hour']),
             max_spots=int(request.form['max_spots'])
         )
+        try:
+            lot.latitude, lot.longitude = _parse_coordinates()
+        except ValueError as error:
+            flash(str(error), 'danger')
+            return render_template('admin/lot_form.html')
         db.session.add(lot)
-        db.session.commit()
+        db.session.flush()
 
-        # Create spots
-        for i in range(1, lot.max_spots + 1):
-            spot = ParkingSpot(lot_id=lot.id, status='A')
-            db.session.add(spot)
+        # Create spots in the same transaction as the lot
+        add_spots(lot.id, lot.max_spots)
+        mark_lots_changed(lot.id)
+        mark_geo_changed()
         db.session.commit()
 
         flash('Parking lot created successfully!', 'success')
@@ -64,6 +78,20 @@ def create_lot():
 
     return render_template('admin/lot_form.html')
 
+# Optional latitude/longitude from the lot form: both or neither
+def _parse_coordinates():
+    latitude = request.form.get('latitude', '').strip()
+    longitude = request.form.get('longitude', '').strip()
+    if not latitude and not longitude:
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except ValueError:
+        raise ValueError('Enter both latitude and longitude as numbers, or leave both empty.')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError('Latitude must be within ±90 and longitude within ±180.')
+    return latitude, longitude
+
 # Edit parking lot
 @admin.route('/lots/<int:lot_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -75,31 +103,29 @@ def edit_lot(lot_id):
         lot.address = request.form['address']
         lot.pin_code = request.form['pin_code']
         lot.price_per_hour = float(request.form['price_per_hour'])
+        try:
+            lot.latitude, lot.longitude = _parse_coordinates()
+        except ValueError as error:
+            db.session.rollback()
+            flash(str(error), 'danger')
+            return redirect(url_for('admin.edit_lot', lot_id=lot_id))
         
         # Get new_max_spots first
         new_max_spots = int(request.form['max_spots'])  # This line was missing
-        current_spots = len(lot.spots)
+        current_spots = ParkingSpot.query.filter_by(lot_id=lot.id).count()
 
         if new_max_spots > current_spots:
-            for _ in range(new_max_spots - current_spots):
-                new_spot = ParkingSpot(lot_id=lot.id, status='A')
-                db.session.add(new_spot)
+            add_spots(lot.id, new_max_spots - current_spots)
         elif new_max_spots < current_spots:
-            # Query for spots that are available and have no reservations.
-            removable_spots = ParkingSpot.query.outerjoin(Reservation).filter(
-                ParkingSpot.lot_id == lot.id,
-                ParkingSpot.status == 'A',
-                Reservation.id == None
-            ).limit(current_spots - new_max_spots).all()
-            
-            if len(removable_spots) == (current_spots - new_max_spots):
-                for spot in removable_spots:
-                    db.session.delete(spot)
-            else:
+            # Only spots that are available and have no reservations can go.
+            if not remove_spots(lot.id, current_spots - new_max_spots):
                 flash('Cannot reduce spots. Some are still occupied.', 'danger')
                 return redirect(url_for('admin.edit_lot', lot_id=lot.id))
 
         lot.max_spots = new_max_spots
+        mark_lots_changed(lot.id)
+        mark_geo_changed()
+        publish_after_commit(lot.id, {'type': 'reload'})
         db.session.commit()
         flash('Parking lot updated.', 'success')
         return redirect(url_for('admin.dashboard'))
@@ -121,39 +147,91 @@ def delete_lot(lot_id):
     for spot in lot.spots:
         db.session.delete(spot)
     db.session.delete(lot)
+    mark_lots_changed(lot.id)
+    mark_geo_changed()
+    publish_after_commit(lot.id, {'type': 'reload'})
     db.session.commit()
     flash('Parking lot deleted.', 'success')
     return redirect(url_for('admin.dashboard'))
 
 # View spots
+SPOTS_PER_PAGE = 100
+
 @admin.route('/lots/<int:lot_id>/spots')
 @login_required
 @admin_required
 def view_spots(lot_id):
     lot = ParkingLot.query.get_or_404(lot_id)
-    
-    spots = ParkingSpot.query.options(
-        db.joinedload(ParkingSpot.reservations).joinedload(Reservation.user)
-    ).filter_by(lot_id=lot.id).order_by(ParkingSpot.id).all()
-    
-    occupied_count = sum(1 for spot in spots if spot.status == 'O')
-    available_count = lot.max_spots - occupied_count
-    
+    status = request.args.get('status')
+    if status not in SPOT_STATUSES:
+        status = None
+    after_id = request.args.get('after', type=int)
+
+    # Only each spot's open reservation is loaded, never its history
+    stmt = select(ParkingSpot).where(ParkingSpot.lot_id == lot.id).options(
+        joinedload(ParkingSpot.current_reservation).joinedload(Reservation.user)
+    )
+    if status:
+        stmt = stmt.where(ParkingSpot.status == status)
+    # Keyset pagination on spot id, resuming after the last id shown
+    if after_id:
+        stmt = stmt.where(ParkingSpot.id > after_id)
+    spots = db.session.execute(
+        stmt.order_by(ParkingSpot.id).limit(SPOTS_PER_PAGE + 1)
+    ).scalars().all()
+
+    next_after = None
+    if len(spots) > SPOTS_PER_PAGE:
+        spots = spots[:SPOTS_PER_PAGE]
+        next_after = spots[-1].id
+
     return render_template(
         'admin/spots.html', 
         lot=lot, 
         spots=spots, 
-        occupied_spots=occupied_count, 
-        available_spots=available_count
+        # totals come from the lot's live counters, not from the page
+        counts=lot_counts(lot),
+        status=status,
+        next_after=next_after,
+        is_first_page=not after_id
     )
     
+# Live spot board: pushes spot status changes of one lot as server-sent
+# events. The stream itself never queries the database; an idle tab only
+# receives a keep-alive comment every SPOT_STREAM_HEARTBEAT seconds.
+SPOT_STREAM_HEARTBEAT = 15
+
+@admin.route('/lots/<int:lot_id>/spots/stream')
+@login_required
+@admin_required
+def stream_spots(lot_id):
+    subscription = event_bus.subscribe(lot_id)
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    payload = subscription.get(timeout=SPOT_STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f'data: {json.dumps(payload)}\n\n'
+        finally:
+            event_bus.unsubscribe(lot_id, subscription)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # Delete spots
 @admin.route('/spots/delete', methods=['POST'])
 @login_required
 @admin_required
 def delete_spots():
-    spot_ids_to_delete = request.form.getlist('spot_ids')
-    lot_id = request.form.get('lot_id')
+    spot_ids_to_delete = request.form.getlist('spot_ids', type=int)
+    lot_id = request.form.get('lot_id', type=int)
 
     if not lot_id:
         flash('An error occurred: Lot ID is missing.', 'danger')
@@ -163,20 +241,10 @@ def delete_spots():
         flash('No spots were selected for deletion.', 'warning')
         return redirect(url_for('admin.view_spots', lot_id=lot_id))
 
-    deleted_count = 0
-    for spot_id in spot_ids_to_delete:
-        spot = ParkingSpot.query.get(spot_id)
-        if spot and spot.status == 'A':
-            db.session.delete(spot)
-            deleted_count += 1
-    
-    if deleted_count > 0:
-        lot = ParkingLot.query.get(lot_id)
-        if lot:
-            lot.max_spots -= deleted_count
-
+    report = bulk_delete_spots(lot_id, spot_ids_to_delete)
     db.session.commit()
     
+    deleted_count = sum(1 for row in report if row['result'] == 'deleted')
     if deleted_count > 0:
         flash(f'{deleted_count} spots were successfully deleted.', 'success')
     else:
@@ -184,6 +252,66 @@ def delete_spots():
 
     return redirect(url_for('admin.view_spots', lot_id=lot_id))
 
+# Bulk actions on the spots of a lot: delete, release, maintenance or back
+# in service. Takes the selected spot_ids, or every spot of the lot with the
+# status given as `scope` ('all' for every spot). Accepts a form post and
+# renders the per-spot report, or JSON in and out for scripts:
+#   {"action": "release", "spot_ids": [1, 2, 3]}
+BULK_ACTIONS = ('delete', 'release', 'maintenance', 'available')
+BULK_MAX_SPOTS = 5000
+
+def _run_bulk_action(action, lot_id, spot_ids):
+    if action == 'delete':
+        return bulk_delete_spots(lot_id, spot_ids)
+    if action == 'release':
+        return bulk_release_spots(lot_id, spot_ids)
+    return set_spots_status(lot_id, spot_ids, 'M' if action == 'maintenance' else 'A')
+
+@admin.route('/lots/<int:lot_id>/spots/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_spots(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        action, spot_ids, scope = data.get('action'), data.get('spot_ids') or [], data.get('scope')
+        if not isinstance(spot_ids, list) or not all(isinstance(spot_id, int) for spot_id in spot_ids):
+            return jsonify(error='spot_ids must be a list of spot ids.'), 400
+    else:
+        action = request.form.get('action')
+        spot_ids = request.form.getlist('spot_ids', type=int)
+        scope = request.form.get('scope')
+
+    if action not in BULK_ACTIONS:
+        if request.is_json:
+            return jsonify(error=f'action must be one of {", ".join(BULK_ACTIONS)}.'), 400
+        flash('Unknown bulk action.', 'danger')
+        return redirect(url_for('admin.view_spots', lot_id=lot.id))
+
+    if scope == 'all' or scope in SPOT_STATUSES:
+        stmt = select(ParkingSpot.id).where(ParkingSpot.lot_id == lot.id)
+        if scope != 'all':
+            stmt = stmt.where(ParkingSpot.status == scope)
+        spot_ids = db.session.execute(stmt.order_by(ParkingSpot.id)).scalars().all()
+    spot_ids = list(dict.fromkeys(spot_ids))
+
+    if not spot_ids or len(spot_ids) > BULK_MAX_SPOTS:
+        message = 'No spots were selected.' if not spot_ids else f'Select at most {BULK_MAX_SPOTS} spots at a time.'
+        if request.is_json:
+            return jsonify(error=message), 400
+        flash(message, 'warning')
+        return redirect(url_for('admin.view_spots', lot_id=lot.id))
+
+    report = _run_bulk_action(action, lot.id, spot_ids)
+    db.session.commit()
+
+    summary = {}
+    for row in report:
+        summary[row['result']] = summary.get(row['result'], 0) + 1
+    if request.is_json:
+        return jsonify(action=action, lot_id=lot.id, summary=summary, spots=report)
+    return render_template('admin/bulk_report.html', lot=lot, action=action, summary=summary, report=report)
+
 # vacate spot
 @admin.route('/spots/<int:spot_id>/release', methods=['POST'])
 @login_required
@@ -199,14 +327,7 @@ def release_spot(spot_id):
 
         if active_reservation:
             # End reservation, calculate cost, free the spot
-            active_reservation.leaving_timestamp = datetime.utcnow()
-            
-            duration_seconds = (active_reservation.leaving_timestamp - active_reservation.parking_timestamp).total_seconds()
-            duration_hours = max(duration_seconds / 3600, 1/60) # cost logic
-            cost = duration_hours * spot.lot.price_per_hour
-            active_reservation.cost = round(cost, 2)
-
-            spot.status = 'A'
+            close_reservation(active_reservation)
             db.session.commit()
             flash('Spot released successfully', 'success')
         else:
@@ -217,33 +338,60 @@ def release_spot(spot_id):
     return redirect(url_for('admin.view_spots', lot_id=spot.lot_id))
 
 # List users
+USERS_PER_PAGE = 50
+
 @admin.route('/users')
 @login_required
 @admin_required
 def list_users():
-    users = User.query.filter_by(is_admin=False).order_by(User.full_name).all()
-    
+    search = request.args.get('q', '').strip()
+    after_id = request.args.get('after', type=int)
+
+    users_query = User.query.filter(User.is_admin == False)
+    if search:
+        users_query = users_query.filter(or_(
+            User.full_name.icontains(search, autoescape=True),
+            User.email.icontains(search, autoescape=True)
+        ))
+    total_users = users_query.count()
+
+    # Keyset pagination on (full_name, id): resume after the last user shown
+    if after_id:
+        after_name = db.session.query(User.full_name).filter(User.id == after_id).scalar_subquery()
+        users_query = users_query.filter(or_(
+            User.full_name > after_name,
+            and_(User.full_name == after_name, User.id > after_id)
+        ))
+
+    # One query for the page: active reservation, its lot and a history probe
+    active = aliased(Reservation)
+    has_history = exists().where(Reservation.user_id == User.id)
+    rows = users_query.outerjoin(
+        active, and_(active.user_id == User.id, active.leaving_timestamp == None)
+    ).outerjoin(
+        ParkingSpot, ParkingSpot.id == active.spot_id
+    ).outerjoin(
+        ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+    ).with_entities(
+        User, active.spot_id, ParkingLot.prime_location_name, has_history.label('has_history')
+    ).order_by(User.full_name, User.id).limit(USERS_PER_PAGE + 1).all()
+
+    next_after = None
+    if len(rows) > USERS_PER_PAGE:
+        rows = rows[:USERS_PER_PAGE]
+        next_after = rows[-1][0].id
+
     users_data = []
-    for user in users:
-        active_reservation = Reservation.query.filter_by(
-            user_id=user.id, 
-            leaving_timestamp=None
-        ).first()
-        
-        if active_reservation:
-            spot = active_reservation.spot
-            status_text = f"Currently Parked at {spot.lot.prime_location_name} (Spot #{spot.id})"
+    for user, spot_id, lot_name, past_reservation in rows:
+        if spot_id:
+            status_text = f"Currently Parked at {lot_name} (Spot #{spot_id})"
             status_class = "success"
+        elif past_reservation:
+            status_text = "Previously Parked"
+            status_class = "secondary"
         else:
-            # 2. Check for any past reservations
-            past_reservation = Reservation.query.filter_by(user_id=user.id).first()
-            if past_reservation:
-                status_text = "Previously Parked"
-                status_class = "secondary"
-            else:
-                # 3. If no reservations at all
-                status_text = "Never Parked"
-                status_class = "light"
+            status_text = "Never Parked"
+            status_class = "light"
 
         users_data.append({
             'user': user,
@@ -251,12 +399,243 @@ def list_users():
             'status_class': status_class
         })
         
-    return render_template('admin/users.html', users_data=users_data)
+    return render_template(
+        'admin/users.html',
+        users_data=users_data,
+        total_users=total_users,
+        search=search,
+        next_after=next_after,
+        is_first_page=not after_id
+    )
 
 # Reservation
+RESERVATIONS_PER_PAGE = 50
+EXPORT_BATCH_SIZE = 1000
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+
+# Filters shared by the reservations log and its export
+def _reservation_filters():
+    return {
+        'lot_id': request.args.get('lot_id', type=int),
+        'user': request.args.get('user', '').strip(),
+        'date_from': request.args.get('date_from', ''),
+        'date_to': request.args.get('date_to', ''),
+        'status': request.args.get('status', ''),
+    }
+
+# Join reservations to their user, spot and lot and apply the filters
+def _filter_reservations(stmt, filters):
+    stmt = stmt.join(Reservation.user).join(Reservation.spot).join(ParkingSpot.lot)
+
+    if filters['lot_id']:
+        stmt = stmt.where(ParkingSpot.lot_id == filters['lot_id'])
+    if filters['user']:
+        stmt = stmt.where(or_(
+            User.full_name.icontains(filters['user'], autoescape=True),
+            User.email.icontains(filters['user'], autoescape=True)
+        ))
+    date_from = _parse_date(filters['date_from'])
+    if date_from:
+        stmt = stmt.where(Reservation.parking_timestamp >= date_from)
+    date_to = _parse_date(filters['date_to'])
+    if date_to:
+        stmt = stmt.where(Reservation.parking_timestamp < date_to + timedelta(days=1))
+    if filters['status'] == 'active':
+        stmt = stmt.where(Reservation.leaving_timestamp == None)
+    elif filters['status'] == 'completed':
+        stmt = stmt.where(Reservation.leaving_timestamp != None)
+    return stmt
+
 @admin.route('/reservations')
 @login_required
 @admin_required
 def list_reservations():
-    all_reservations = Reservation.query.order_by(Reservation.id.desc()).all()
-    return render_template('admin/reservations.html', reservations=all_reservations)
+    filters = _reservation_filters()
+    before_id = request.args.get('before', type=int)
+
+    stmt = _filter_reservations(select(Reservation), filters).options(
+        contains_eager(Reservation.user),
+        contains_eager(Reservation.spot).contains_eager(ParkingSpot.lot)
+    )
+    # Keyset pagination on id: newest first, resume below the last id shown
+    if before_id:
+        stmt = stmt.where(Reservation.id < before_id)
+    reservations = execute_read(
+        stmt.order_by(Reservation.id.desc()).limit(RESERVATIONS_PER_PAGE + 1)
+    ).scalars().all()
+
+    next_before = None
+    if len(reservations) > RESERVATIONS_PER_PAGE:
+        reservations = reservations[:RESERVATIONS_PER_PAGE]
+        next_before = reservations[-1].id
+
+    lots = db.session.query(ParkingLot.id, ParkingLot.prime_location_name).order_by(ParkingLot.id).all()
+    return render_template(
+        'admin/reservations.html',
+        reservations=reservations,
+        lots=lots,
+        filters=filters,
+        filter_args={key: value for key, value in filters.items() if value},
+        next_before=next_before,
+        is_first_page=not before_id
+    )
+
+EXPORT_COLUMNS = [
+    'id', 'user_email', 'user_name', 'lot', 'spot_id',
+    'parking_timestamp', 'leaving_timestamp', 'cost', 'status'
+]
+
+# Stream the filtered reservation log as CSV or NDJSON, one row at a time
+@admin.route('/reservations/export')
+@login_required
+@admin_required
+def export_reservations():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        abort(400)
+
+    stmt = _filter_reservations(select(
+        Reservation.id,
+        User.email.label('user_email'),
+        User.full_name.label('user_name'),
+        ParkingLot.prime_location_name.label('lot'),
+        Reservation.spot_id,
+        Reservation.parking_timestamp,
+        Reservation.leaving_timestamp,
+        Reservation.cost
+    ), _reservation_filters()).order_by(Reservation.id.desc())
+
+    # yield_per fetches the result in batches instead of buffering it all
+    def export_rows():
+        result = execute_read(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in result:
+            record = dict(row._mapping)
+            if not record['leaving_timestamp']:
+                record['status'] = 'active'
+            elif not record['parking_timestamp']:
+                record['status'] = 'expired'
+            else:
+                record['status'] = 'completed'
+            for key in ('parking_timestamp', 'leaving_timestamp'):
+                if record[key]:
+                    record[key] = record[key].isoformat()
+            yield record
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+        writer.writeheader()
+        for record in export_rows():
+            writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    def generate_ndjson():
+        for record in export_rows():
+            yield json.dumps(record) + '\n'
+
+    if export_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=reservations.{export_format}'
+    return response
+
+# Revenue, utilization and average dwell time per lot, day or hour of day,
+# as JSON. The period defaults to the last 30 days.
+@admin.route('/analytics')
+@login_required
+@admin_required
+def analytics():
+    group = request.args.get('group', 'lot')
+    if group not in GROUPINGS:
+        abort(400)
+
+    date_to = _parse_date(request.args.get('date_to')) or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = date_to + timedelta(days=1)
+    start = _parse_date(request.args.get('date_from')) or end - timedelta(days=30)
+    if start >= end:
+        abort(400)
+
+    lot_id = request.args.get('lot_id', type=int)
+    return jsonify(
+        group=group,
+        date_from=start.date().isoformat(),
+        date_to=date_to.date().isoformat(),
+        lot_id=lot_id,
+        rows=revenue_report(group, start, end, lot_id)
+    )
+
+# Hourly occupancy of one lot from the rollup table, as JSON for charts.
+# The period defaults to the last 7 days.
+@admin.route('/lots/<int:lot_id>/occupancy')
+@login_required
+@admin_required
+def lot_occupancy_report(lot_id):
+    lot = ParkingLot.query.get_or_404(lot_id)
+
+    date_to = _parse_date(request.args.get('date_to')) or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = date_to + timedelta(days=1)
+    start = _parse_date(request.args.get('date_from')) or end - timedelta(days=7)
+
+    hours = lot_occupancy(lot.id, start, end)
+    for hour in hours:
+        hour['utilization'] = round(hour['occupied_minutes'] / (lot.max_spots * 60), 4) if lot.max_spots else None
+    return jsonify(
+        lot_id=lot.id,
+        date_from=start.date().isoformat(),
+        date_to=date_to.date().isoformat(),
+        hours=hours
+    )
+
+# Per-endpoint request metrics, when INSTRUMENTATION_ENABLED is set
+@admin.route('/metrics')
+@login_required
+@admin_required
+def metrics():
+    request_metrics = get_metrics(current_app)
+    return render_template(
+        'admin/metrics.html',
+        enabled=request_metrics is not None,
+        endpoints=request_metrics.snapshot() if request_metrics else {},
+        query_budget=request_metrics.query_budget if request_metrics else None,
+        cache_stats=cache.stats(),
+        user_cache_stats=user_cache.stats()
+    )
+
+@admin.route('/metrics/reset', methods=['POST'])
+@login_required
+@admin_required
+def reset_metrics():
+    request_metrics = get_metrics(current_app)
+    if request_metrics:
+        request_metrics.reset()
+    flash('Request metrics cleared.', 'info')
+    return redirect(url_for('admin.metrics'))
+
+# Prometheus scrape endpoint. Open to admins, or to anyone presenting
+# METRICS_TOKEN as a bearer token.
+@admin.route('/metrics/prometheus')
+def prometheus_metrics():
+    token = current_app.config['METRICS_TOKEN']
+    supplied = request.headers.get('Authorization', '')
+    token_ok = token and hmac.compare_digest(supplied, f'Bearer {token}')
+    if not token_ok and not (current_user.is_authenticated and current_user.is_admin):
+        abort(403)
+
+    request_metrics = get_metrics(current_app)
+    if request_metrics is None:
+        abort(404)
+    return Response(
+        prometheus_text(request_metrics, cache.stats(), user_cache.stats()),
+        mimetype='text/plain; version=0.0.4'
+    )
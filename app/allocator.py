@@ -0,0 +1,46 @@
+import time
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from app.models import db, ParkingSpot
+from app.availability import record_transition
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 0.01  # seconds, doubled after every failed attempt
+
+# Claim a free spot in the lot by flipping it from 'A' to 'R'.
+#
+# The claim is a conditional UPDATE guarded by status = 'A', so when two
+# requests pick the same candidate only one of them changes the row; the
+# other sees rowcount 0 and tries the next free spot. A spot can therefore
+# never be handed out twice. Returns the claimed spot id, or None when the
+# lot has no free spots. The caller commits.
+def allocate_spot(lot_id):
+    delay = RETRY_DELAY
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            spot_id = db.session.execute(
+                select(ParkingSpot.id)
+                .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'A')
+                .limit(1)
+            ).scalar()
+            if spot_id is None:
+                return None
+
+            claimed = db.session.execute(
+                update(ParkingSpot)
+                .where(ParkingSpot.id == spot_id, ParkingSpot.status == 'A')
+                .values(status='R')
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        except OperationalError:
+            # another writer holds the database lock; start over
+            db.session.rollback()
+            claimed = 0
+
+        if claimed:
+            record_transition(lot_id, 'A', 'R')
+            return spot_id
+
+        time.sleep(delay)
+        delay *= 2
+    return None
@@ -0,0 +1,75 @@
+from sqlalchemy import Integer, cast, func, select
+from app.models import OccupancyRollup, ParkingLot
+from app.database import execute_read
+
+# Revenue and occupancy figures read from the hourly occupancy rollups (see
+# app.rollups), so a report costs O(hours x lots) rows however long the
+# reservation history is.
+#
+# A session counts, with its cost and length, in the hour it started;
+# occupied time counts in the hours it actually spans.
+GROUPINGS = ('lot', 'day', 'hour')
+
+def _in_range(stmt, start, end, lot_id=None):
+    stmt = stmt.where(OccupancyRollup.hour >= start, OccupancyRollup.hour < end)
+    if lot_id:
+        stmt = stmt.where(OccupancyRollup.lot_id == lot_id)
+    return stmt
+
+def _aggregates():
+    return (
+        func.coalesce(func.sum(OccupancyRollup.sessions), 0).label('sessions'),
+        func.coalesce(func.sum(OccupancyRollup.revenue), 0.0).label('revenue'),
+        func.coalesce(func.sum(OccupancyRollup.occupied_minutes), 0.0).label('occupied_minutes'),
+        func.coalesce(func.sum(OccupancyRollup.dwell_minutes), 0.0).label('dwell_minutes'),
+    )
+
+def _row(group_value, row, capacity_seconds):
+    occupied_seconds = row.occupied_minutes * 60
+    return {
+        'group': group_value,
+        'sessions': row.sessions,
+        'revenue': round(row.revenue, 2),
+        'occupied_hours': round(occupied_seconds / 3600, 2),
+        'avg_dwell_minutes': round(row.dwell_minutes / row.sessions, 1) if row.sessions else 0.0,
+        'utilization': round(occupied_seconds / capacity_seconds, 4) if capacity_seconds else None,
+    }
+
+# Capacity in spot-seconds of all lots (or one lot) over `seconds`
+def _capacity(seconds, lot_id=None):
+    stmt = select(func.coalesce(func.sum(ParkingLot.max_spots), 0))
+    if lot_id:
+        stmt = stmt.where(ParkingLot.id == lot_id)
+    return execute_read(stmt).scalar() * seconds
+
+def revenue_report(group, start, end, lot_id=None):
+    period_seconds = (end - start).total_seconds()
+
+    if group == 'lot':
+        stmt = select(
+            OccupancyRollup.lot_id, ParkingLot.prime_location_name, ParkingLot.max_spots, *_aggregates()
+        ).join(
+            ParkingLot, ParkingLot.id == OccupancyRollup.lot_id
+        ).group_by(OccupancyRollup.lot_id).order_by(OccupancyRollup.lot_id)
+        rows = execute_read(_in_range(stmt, start, end, lot_id)).all()
+        return [
+            dict(_row(row.lot_id, row, row.max_spots * period_seconds), lot_name=row.prime_location_name)
+            for row in rows
+        ]
+
+    if group == 'day':
+        key = func.date(OccupancyRollup.hour)
+        bucket_seconds = 86400
+    else:
+        key = cast(func.strftime('%H', OccupancyRollup.hour), Integer)
+        # every hour-of-day occurs once per day of the period
+        bucket_seconds = period_seconds / 24
+
+    stmt = select(key.label('bucket'), *_aggregates()).group_by(key).order_by(key)
+    rows = execute_read(_in_range(stmt, start, end, lot_id)).all()
+
+    capacity = _capacity(bucket_seconds, lot_id)
+    return [
+        _row(row.bucket, row, capacity)
+        for row in rows
+    ]
@@ -0,0 +1,222 @@
+from functools import wraps
+from flask import Blueprint, jsonify, request
+from flask_login import login_user, logout_user, current_user
+from werkzeug.exceptions import HTTPException
+from app.models import db, User, Reservation
+from app.availability import get_lots_snapshot
+from app.geo import search_lots
+from app.hashing import HashingBusy, check_user_password
+from app.history import get_history_page, get_user_totals
+from app.parking import (
+    ParkingError, get_active_reservation, occupy_spot, release_spot, reserve_spot
+)
+
+# JSON API for the mobile app and kiosks. Uses the same service functions
+# as the HTML views in app/user.py; authentication is the Flask-Login
+# session cookie obtained from POST /api/v1/session.
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+API_HISTORY_PER_PAGE = 25
+API_MAX_BATCH_LOTS = 200
+
+def api_error(message, status):
+    response = jsonify({'error': message})
+    response.status_code = status
+    return response
+
+# like login_required, but answers 401 JSON instead of redirecting to the login page
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return api_error('Authentication required.', 401)
+        return f(*args, **kwargs)
+    return decorated_function
+
+@api.errorhandler(HTTPException)
+def handle_http_error(error):
+    return api_error(error.description, error.code)
+
+@api.errorhandler(ParkingError)
+def handle_parking_error(error):
+    db.session.rollback()
+    return api_error(str(error), 409)
+
+def _json_body():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return {}
+    return data
+
+def _availability(lot):
+    return {
+        'lot_id': lot['id'],
+        'max_spots': lot['max_spots'],
+        'available_spots': lot['available_spots'],
+        'reserved_spots': lot['reserved_spots'],
+        'occupied_spots': lot['occupied_spots'],
+    }
+
+def _reservation_json(reservation):
+    spot = reservation.spot
+    return {
+        'id': reservation.id,
+        'spot_id': reservation.spot_id,
+        'lot_id': spot.lot_id,
+        'lot_name': spot.lot.prime_location_name,
+        'spot_status': spot.status,
+        'created_at': reservation.created_at.isoformat() if reservation.created_at else None,
+        'parking_timestamp': reservation.parking_timestamp.isoformat() if reservation.parking_timestamp else None,
+        'leaving_timestamp': reservation.leaving_timestamp.isoformat() if reservation.leaving_timestamp else None,
+        'cost': reservation.cost,
+        'expired': reservation.is_expired,
+    }
+
+# Availability responses carry an ETag so pollers get 304 while nothing changed
+def _conditional_json(payload):
+    response = jsonify(payload)
+    response.add_etag()
+    return response.make_conditional(request)
+
+def _own_reservation(reservation_id):
+    reservation = db.session.get(Reservation, reservation_id)
+    if reservation is None or reservation.user_id != current_user.id:
+        return None
+    return reservation
+
+# Session
+@api.route('/session', methods=['POST'])
+def create_session():
+    data = _json_body()
+    user = User.query.filter_by(email=data.get('email')).first()
+    try:
+        valid = user is not None and check_user_password(user, data.get('password') or '')
+    except HashingBusy as e:
+        return api_error(str(e), 503)
+    if not valid:
+        return api_error('Invalid email or password.', 401)
+    db.session.commit()
+    login_user(user)
+    return jsonify({'id': user.id, 'email': user.email, 'full_name': user.full_name, 'is_admin': user.is_admin})
+
+@api.route('/session', methods=['DELETE'])
+@api_login_required
+def delete_session():
+    logout_user()
+    return '', 204
+
+# Lots and availability
+@api.route('/lots')
+@api_login_required
+def list_lots():
+    return _conditional_json({'lots': get_lots_snapshot()})
+
+@api.route('/lots/<int:lot_id>/availability')
+@api_login_required
+def lot_availability(lot_id):
+    for lot in get_lots_snapshot():
+        if lot['id'] == lot_id:
+            return _conditional_json(_availability(lot))
+    return api_error('Parking lot not found.', 404)
+
+def _batch_availability(lot_ids):
+    if len(lot_ids) > API_MAX_BATCH_LOTS:
+        return api_error(f'At most {API_MAX_BATCH_LOTS} lots per request.', 400)
+    lots = {lot['id']: lot for lot in get_lots_snapshot()}
+    return _conditional_json({
+        'lots': [_availability(lots[lot_id]) for lot_id in lot_ids if lot_id in lots],
+        'missing': [lot_id for lot_id in lot_ids if lot_id not in lots],
+    })
+
+# GET /lots/availability?ids=1,2,3 (all lots when ids is omitted)
+@api.route('/lots/availability')
+@api_login_required
+def batch_availability():
+    ids = request.args.get('ids')
+    if not ids:
+        return _conditional_json({'lots': [_availability(lot) for lot in get_lots_snapshot()], 'missing': []})
+    try:
+        lot_ids = [int(value) for value in ids.split(',') if value.strip()]
+    except ValueError:
+        return api_error('ids must be a comma separated list of lot ids.', 400)
+    return _batch_availability(lot_ids)
+
+# POST /lots/availability/batch with {"lot_ids": [...]} for long id lists
+@api.route('/lots/availability/batch', methods=['POST'])
+@api_login_required
+def batch_availability_post():
+    lot_ids = _json_body().get('lot_ids')
+    if not isinstance(lot_ids, list) or not all(isinstance(lot_id, int) for lot_id in lot_ids):
+        return api_error('lot_ids must be a list of lot ids.', 400)
+    return _batch_availability(lot_ids)
+
+# GET /lots/search?lat=..&lon=.. or ?pin=.. [&radius_km=5&limit=20&include_full=1]
+# Nearest lots with free spots first; see app.geo.search_lots
+@api.route('/lots/search')
+@api_login_required
+def search():
+    lat = request.args.get('lat', type=float)
+    lon = request.args.get('lon', type=float)
+    pin_code = request.args.get('pin', '').strip() or None
+    if (lat is None or lon is None) and not pin_code:
+        return api_error('Give lat and lon, or pin.', 400)
+    radius_km = request.args.get('radius_km', type=float)
+    if radius_km is not None and radius_km <= 0:
+        return api_error('radius_km must be positive.', 400)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    lots = search_lots(
+        lat=lat, lon=lon, pin_code=pin_code, radius_km=radius_km, limit=limit,
+        include_full=request.args.get('include_full', type=int) == 1
+    )
+    return jsonify({'lots': lots})
+
+# Reservations
+@api.route('/reservations', methods=['POST'])
+@api_login_required
+def create_reservation():
+    lot_id = _json_body().get('lot_id')
+    if not isinstance(lot_id, int):
+        return api_error('lot_id is required.', 400)
+    reservation = reserve_spot(current_user, lot_id)
+    db.session.commit()
+    return jsonify(_reservation_json(reservation)), 201
+
+@api.route('/reservations/active')
+@api_login_required
+def active_reservation():
+    reservation = get_active_reservation(current_user.id)
+    return jsonify({'reservation': _reservation_json(reservation) if reservation else None})
+
+@api.route('/reservations/<int:reservation_id>/occupy', methods=['POST'])
+@api_login_required
+def occupy_reservation(reservation_id):
+    reservation = _own_reservation(reservation_id)
+    if reservation is None:
+        return api_error('Reservation not found.', 404)
+    occupy_spot(reservation, current_user)
+    db.session.commit()
+    return jsonify(_reservation_json(reservation))
+
+@api.route('/reservations/<int:reservation_id>/release', methods=['POST'])
+@api_login_required
+def release_reservation(reservation_id):
+    reservation = _own_reservation(reservation_id)
+    if reservation is None:
+        return api_error('Reservation not found.', 404)
+    release_spot(reservation, current_user)
+    db.session.commit()
+    return jsonify(_reservation_json(reservation))
+
+# History, newest first; pass next_before as ?before= for the next page
+@api.route('/history')
+@api_login_required
+def history():
+    before_id = request.args.get('before', type=int)
+    reservations, next_before = get_history_page(current_user.id, before_id, API_HISTORY_PER_PAGE)
+    totals, lot_totals = get_user_totals(current_user.id)
+    return jsonify({
+        'reservations': [_reservation_json(reservation) for reservation in reservations],
+        'next_before': next_before,
+        'totals': totals,
+        'lots': lot_totals,
+    })
@@ -0,0 +1,131 @@
+import hashlib
+import json
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from app.models import db, ParkingLot, ParkingSpot
+from app.cache import cache
+from app.database import execute_read
+
+# A = Available, R = Reserved, O = Occupied, M = under Maintenance
+SPOT_STATUSES = ('A', 'R', 'O', 'M')
+
+# ParkingLot counter column for each spot status
+STATUS_COUNTERS = {
+    'A': 'available_spots',
+    'R': 'reserved_spots',
+    'O': 'occupied_spots',
+    'M': 'maintenance_spots',
+}
+
+def empty_counts():
+    return dict.fromkeys(SPOT_STATUSES, 0)
+
+def lot_counts(lot):
+    return {status: getattr(lot, column) for status, column in STATUS_COUNTERS.items()}
+
+# Shift a lot's counters in place with a single UPDATE, e.g. {'A': -1, 'R': 1}.
+# Must run in the same transaction as the spot changes it describes.
+def adjust_counters(lot_id, deltas):
+    values = {}
+    for status, delta in deltas.items():
+        if delta:
+            column = getattr(ParkingLot, STATUS_COUNTERS[status])
+            values[column] = column + delta
+    if values:
+        ParkingLot.query.filter_by(id=lot_id).update(values)
+        mark_lots_changed(lot_id)
+
+# Record spots in a lot moving from one status to another
+def record_transition(lot_id, old_status, new_status, count=1):
+    adjust_counters(lot_id, {old_status: -count, new_status: count})
+
+# Per-lot spot counts for every status, computed in a single grouped query.
+# This scans parking_spots, so it is only used to rebuild the counters.
+def count_spots_by_status():
+    rows = db.session.query(
+        ParkingSpot.lot_id, ParkingSpot.status, func.count(ParkingSpot.id)
+    ).group_by(ParkingSpot.lot_id, ParkingSpot.status).all()
+
+    availability = {}
+    for lot_id, status, count in rows:
+        availability.setdefault(lot_id, empty_counts())[status] = count
+    return availability
+
+# Compare every lot's counters with its spot rows. Returns a list of
+# (lot, stored_counts, actual_counts) for the lots that disagree, and
+# rewrites the counters of those lots when fix is set.
+def reconcile_counters(fix=True):
+    actual = count_spots_by_status()
+    mismatches = []
+    for lot in ParkingLot.query.order_by(ParkingLot.id).all():
+        stored = lot_counts(lot)
+        counts = actual.get(lot.id, empty_counts())
+        if stored != counts:
+            mismatches.append((lot, stored, counts))
+            if fix:
+                for status, column in STATUS_COUNTERS.items():
+                    setattr(lot, column, counts[status])
+    if fix and mismatches:
+        mark_lots_changed(*(lot.id for lot, _, _ in mismatches))
+        db.session.commit()
+    return mismatches
+
+# Cached snapshot of every lot with its counters, as rendered by the
+# dashboards. Plain dicts, so any cache backend can store them.
+LOTS_CACHE_KEY = 'availability:lots'
+
+def _lot_snapshot(lot):
+    return {
+        'id': lot.id,
+        'prime_location_name': lot.prime_location_name,
+        'address': lot.address,
+        'pin_code': lot.pin_code,
+        'latitude': lot.latitude,
+        'longitude': lot.longitude,
+        'price_per_hour': lot.price_per_hour,
+        'max_spots': lot.max_spots,
+        'available_spots': lot.available_spots,
+        'reserved_spots': lot.reserved_spots,
+        'occupied_spots': lot.occupied_spots,
+        'maintenance_spots': lot.maintenance_spots,
+    }
+
+# Fingerprint of a lot snapshot. Cached page fragments for a lot are keyed
+# by it, so a card can only be served for exactly the data it was rendered
+# from, whichever process made the change (see app.fragments).
+def snapshot_version(snapshot):
+    encoded = json.dumps(snapshot, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+def get_lots_snapshot():
+    lots = cache.get(LOTS_CACHE_KEY)
+    if lots is None:
+        rows = execute_read(select(ParkingLot).order_by(ParkingLot.id)).scalars().all()
+        lots = []
+        for lot in rows:
+            snapshot = _lot_snapshot(lot)
+            snapshot['version'] = snapshot_version(snapshot)
+            lots.append(snapshot)
+        cache.set(LOTS_CACHE_KEY, lots, current_app.config['AVAILABILITY_CACHE_TTL'])
+    return lots
+
+# Writes that change a lot or its spots call this. The cached availability
+# is dropped once the transaction commits, so other processes see the
+# change within AVAILABILITY_CACHE_TTL and this one immediately.
+CHANGED_LOTS_KEY = 'availability_changed_lots'
+
+def mark_lots_changed(*lot_ids):
+    db.session.info.setdefault(CHANGED_LOTS_KEY, set()).update(lot_ids)
+
+def invalidate_availability():
+    cache.delete(LOTS_CACHE_KEY)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    if session.info.pop(CHANGED_LOTS_KEY, None):
+        invalidate_availability()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(CHANGED_LOTS_KEY, None)
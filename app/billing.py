@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from flask import current_app
+
+# Pricing rules, all read from the config:
+#   BILLING_MINIMUM_MINUTES   shortest duration billed (shorter stays pay this)
+#   BILLING_MINIMUM_CHARGE    lowest amount charged for any session
+#   BILLING_PEAK_HOURS        (start_hour, end_hour) of the daily peak window, or None;
+#                             may wrap past midnight, e.g. (22, 6)
+#   BILLING_PEAK_MULTIPLIER   rate multiplier inside the peak window
+#   BILLING_OFF_PEAK_MULTIPLIER  rate multiplier outside it
+def get_pricing_rules():
+    config = current_app.config
+    return {
+        'minimum_minutes': config['BILLING_MINIMUM_MINUTES'],
+        'minimum_charge': config['BILLING_MINIMUM_CHARGE'],
+        'peak_hours': config['BILLING_PEAK_HOURS'],
+        'peak_multiplier': config['BILLING_PEAK_MULTIPLIER'],
+        'off_peak_multiplier': config['BILLING_OFF_PEAK_MULTIPLIER'],
+    }
+
+# Daily peak window as (start_hour, end_hour) pieces within one day; a
+# window that wraps past midnight, e.g. (22, 6), becomes [22, 24) and [0, 6)
+def _peak_windows(peak_hours):
+    start_hour, end_hour = peak_hours
+    if start_hour <= end_hour:
+        return [(start_hour, end_hour)]
+    return [(start_hour, 24), (0, end_hour)]
+
+# Seconds of [start, end) that fall inside the daily peak window
+def _peak_seconds(start, end, peak_hours):
+    windows = _peak_windows(peak_hours)
+    total = 0.0
+    day = datetime(start.year, start.month, start.day)
+    while day < end:
+        for start_hour, end_hour in windows:
+            window_start = day + timedelta(hours=start_hour)
+            window_end = day + timedelta(hours=end_hour)
+            overlap = (min(end, window_end) - max(start, window_start)).total_seconds()
+            if overlap > 0:
+                total += overlap
+        day += timedelta(days=1)
+    return total
+
+# Cost of a parking session, rounded to 2 decimals
+def compute_cost(parking_timestamp, leaving_timestamp, price_per_hour, rules=None):
+    rules = rules or get_pricing_rules()
+    billed_seconds = max(
+        (leaving_timestamp - parking_timestamp).total_seconds(),
+        rules['minimum_minutes'] * 60
+    )
+
+    if rules['peak_hours']:
+        billed_end = parking_timestamp + timedelta(seconds=billed_seconds)
+        peak = _peak_seconds(parking_timestamp, billed_end, rules['peak_hours'])
+        off_peak = billed_seconds - peak
+        cost = price_per_hour * (peak * rules['peak_multiplier'] + off_peak * rules['off_peak_multiplier']) / 3600
+    else:
+        cost = price_per_hour * billed_seconds / 3600
+
+    return round(max(cost, rules['minimum_charge']), 2)
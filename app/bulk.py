@@ -0,0 +1,237 @@
+from datetime import datetime
+from sqlalchemy import case, delete, exists, select, update
+from app.models import db, ParkingLot, ParkingSpot, Reservation
+from app.availability import mark_lots_changed, record_transition
+from app.billing import compute_cost, get_pricing_rules
+from app.events import publish_after_commit, spot_event
+from app.history import record_sessions
+from app.rollups import record_occupancies
+
+# Bulk spot operations for the admin spot board. Each one works on a lot and
+# a list of spot ids with a fixed number of set-based statements, however
+# many spots are selected, and returns a per-spot report:
+#   [{'spot_id': 12, 'result': 'released', 'detail': '₹40.00'}, ...]
+# The result is 'deleted', 'released' or 'updated' for spots that were
+# changed, and 'skipped' with the reason in detail otherwise.
+# The caller commits, so a bulk operation is a single transaction.
+
+# status -> statuses a spot may be moved to by set_spots_status
+STATUS_CHANGES = {
+    'M': ('A',),  # into maintenance: only free spots
+    'A': ('M',),  # back in service: only spots under maintenance
+}
+
+STATUS_NAMES = {'A': 'available', 'R': 'reserved', 'O': 'occupied', 'M': 'under maintenance'}
+
+def _report(spot_ids, results):
+    return [
+        {'spot_id': spot_id, 'result': results[spot_id][0], 'detail': results[spot_id][1]}
+        for spot_id in spot_ids
+    ]
+
+def _load_statuses(lot_id, spot_ids):
+    return dict(db.session.execute(
+        select(ParkingSpot.id, ParkingSpot.status)
+        .where(ParkingSpot.lot_id == lot_id, ParkingSpot.id.in_(spot_ids))
+    ).all())
+
+# Delete available spots that have never been reserved (deleting a spot with
+# history would orphan its reservations) and shrink the lot's max_spots by
+# the number actually deleted.
+def delete_spots(lot_id, spot_ids):
+    rows = db.session.execute(
+        select(
+            ParkingSpot.id, ParkingSpot.status,
+            exists().where(Reservation.spot_id == ParkingSpot.id)
+        ).where(ParkingSpot.lot_id == lot_id, ParkingSpot.id.in_(spot_ids))
+    ).all()
+
+    results = dict.fromkeys(spot_ids, ('skipped', 'not in this lot'))
+    candidates = []
+    for spot_id, status, has_history in rows:
+        if status != 'A':
+            results[spot_id] = ('skipped', STATUS_NAMES[status])
+        elif has_history:
+            results[spot_id] = ('skipped', 'has reservation history')
+        else:
+            candidates.append(spot_id)
+
+    deleted = []
+    if candidates:
+        # guarded again in SQL, in case a spot was reserved meanwhile
+        deleted = db.session.execute(
+            delete(ParkingSpot)
+            .where(
+                ParkingSpot.id.in_(candidates),
+                ParkingSpot.status == 'A',
+                ~exists().where(Reservation.spot_id == ParkingSpot.id)
+            )
+            .returning(ParkingSpot.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+    for spot_id in candidates:
+        results[spot_id] = ('deleted', '') if spot_id in deleted else ('skipped', 'reserved meanwhile')
+
+    if deleted:
+        # max_spots and the counter move together in one UPDATE
+        db.session.execute(
+            update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(
+                max_spots=ParkingLot.max_spots - len(deleted),
+                available_spots=ParkingLot.available_spots - len(deleted)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        mark_lots_changed(lot_id)
+        publish_after_commit(lot_id, {'type': 'reload'})
+    return _report(spot_ids, results)
+
+# Close open reservations with their own cost and duration. SQLite cannot
+# return rows from an executemany, so each batch is a single UPDATE that
+# picks the values per id with CASE; the guard skips any that a user
+# released in the meantime, and RETURNING gives the ids actually closed.
+CLOSE_BATCH_SIZE = 500
+
+def _close_reservations(closings, now):
+    closed_ids = set()
+    for start in range(0, len(closings), CLOSE_BATCH_SIZE):
+        batch = closings[start:start + CLOSE_BATCH_SIZE]
+        costs = {closing['reservation_id']: closing['cost'] for closing in batch}
+        # reservations that were never occupied keep a NULL duration
+        durations = {
+            closing['reservation_id']: closing['duration_seconds']
+            for closing in batch if closing['duration_seconds'] is not None
+        }
+        values = {'leaving_timestamp': now, 'cost': case(costs, value=Reservation.id)}
+        if durations:
+            values['duration_seconds'] = case(durations, value=Reservation.id)
+        closed_ids.update(db.session.execute(
+            update(Reservation)
+            .where(Reservation.id.in_(costs), Reservation.leaving_timestamp == None)
+            .values(values)
+            .returning(Reservation.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+    return closed_ids
+
+# Force-release spots: every open reservation on them is closed. Occupied
+# spots are billed as if the user had left now and their sessions added to
+# the user totals and occupancy rollups; reserved spots that were never
+# occupied are closed without a charge. Either way the spot becomes
+# available.
+def release_spots(lot_id, spot_ids):
+    lot = db.session.get(ParkingLot, lot_id)
+    statuses = _load_statuses(lot_id, spot_ids)
+    open_reservations = db.session.execute(
+        select(
+            Reservation.id, Reservation.spot_id, Reservation.user_id,
+            Reservation.parking_timestamp, ParkingSpot.status
+        )
+        .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .where(
+            ParkingSpot.lot_id == lot_id,
+            ParkingSpot.id.in_(spot_ids),
+            ParkingSpot.status.in_(('R', 'O')),
+            Reservation.leaving_timestamp == None
+        )
+    ).all()
+
+    results = {}
+    for spot_id in spot_ids:
+        status = statuses.get(spot_id)
+        if status is None:
+            results[spot_id] = ('skipped', 'not in this lot')
+        elif status not in ('R', 'O'):
+            results[spot_id] = ('skipped', STATUS_NAMES[status])
+        else:
+            results[spot_id] = ('skipped', 'no active reservation')
+    if not open_reservations:
+        return _report(spot_ids, results)
+
+    now = datetime.utcnow()
+    rules = get_pricing_rules()
+    closings = []
+    for reservation_id, spot_id, user_id, parking_timestamp, status in open_reservations:
+        billed = status == 'O' and parking_timestamp is not None
+        closings.append({
+            'reservation_id': reservation_id,
+            'spot_id': spot_id,
+            'user_id': user_id,
+            'status': 'O' if billed else 'R',
+            'parking_timestamp': parking_timestamp,
+            'cost': compute_cost(parking_timestamp, now, lot.price_per_hour, rules) if billed else 0.0,
+            'duration_seconds': int((now - parking_timestamp).total_seconds()) if billed else None,
+        })
+
+    closed_ids = _close_reservations(closings, now)
+    closings = [closing for closing in closings if closing['reservation_id'] in closed_ids]
+
+    # one UPDATE per old status, so each is a single counter transition
+    freed = set()
+    for old_status in ('O', 'R'):
+        ids = [closing['spot_id'] for closing in closings if closing['status'] == old_status]
+        if not ids:
+            continue
+        changed = db.session.execute(
+            update(ParkingSpot)
+            .where(ParkingSpot.id.in_(ids), ParkingSpot.status == old_status)
+            .values(status='A')
+            .returning(ParkingSpot.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        record_transition(lot_id, old_status, 'A', len(changed))
+        freed.update(changed)
+
+    billed = [closing for closing in closings if closing['status'] == 'O']
+    record_sessions([
+        (closing['user_id'], lot_id, closing['cost'], closing['duration_seconds'])
+        for closing in billed
+    ])
+    record_occupancies([(lot_id, closing['parking_timestamp'], now, closing['cost']) for closing in billed])
+    for closing in closings:
+        if closing['spot_id'] in freed:
+            publish_after_commit(lot_id, spot_event(closing['spot_id'], closing['status'], 'A'))
+            if closing['status'] == 'O':
+                results[closing['spot_id']] = ('released', f"₹{closing['cost']:.2f}")
+            else:
+                results[closing['spot_id']] = ('released', 'reservation cancelled')
+    return _report(spot_ids, results)
+
+# Move spots between available and maintenance, e.g. closing a floor.
+# Reserved and occupied spots are left alone; release them first.
+def set_spots_status(lot_id, spot_ids, new_status):
+    allowed_from = STATUS_CHANGES[new_status]
+    statuses = _load_statuses(lot_id, spot_ids)
+
+    results = {}
+    candidates = []
+    for spot_id in spot_ids:
+        status = statuses.get(spot_id)
+        if status is None:
+            results[spot_id] = ('skipped', 'not in this lot')
+        elif status == new_status:
+            results[spot_id] = ('skipped', f'already {STATUS_NAMES[status]}')
+        elif status not in allowed_from:
+            results[spot_id] = ('skipped', STATUS_NAMES[status])
+        else:
+            candidates.append(spot_id)
+
+    changed = set()
+    if candidates:
+        changed = set(db.session.execute(
+            update(ParkingSpot)
+            .where(ParkingSpot.id.in_(candidates), ParkingSpot.status.in_(allowed_from))
+            .values(status=new_status)
+            .returning(ParkingSpot.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+    for spot_id in candidates:
+        results[spot_id] = ('updated', STATUS_NAMES[new_status]) if spot_id in changed else ('skipped', 'changed meanwhile')
+
+    if changed:
+        # allowed_from has a single status for every supported change
+        record_transition(lot_id, allowed_from[0], new_status, len(changed))
+        for spot_id in changed:
+            publish_after_commit(lot_id, spot_event(spot_id, allowed_from[0], new_status))
+    return _report(spot_ids, results)
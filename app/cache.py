@@ -0,0 +1,209 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# In-process backend: an LRU of key -> (expires_at, value), guarded by a
+# lock. Values are stored as-is, so callers must treat them as read-only.
+#
+# At most max_entries values are kept; the least recently used go first,
+# and expired entries are swept every SWEEP_INTERVAL seconds, so keys that
+# are never read again (e.g. fragments of an outdated lot snapshot) cannot pile
+# up. Counters from incr() are kept apart and never evicted: losing one
+# would restart a version number and could bring back a stale fragment.
+class MemoryBackend:
+    SWEEP_INTERVAL = 60  # seconds
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data) + len(self._counters)
+
+    def _get(self, key):
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def get_many(self, keys):
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    # called with the lock held, after every write
+    def _prune(self):
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            expired = [key for key, (expires_at, _) in self._data.items() if expires_at is not None and expires_at < now]
+            for key in expired:
+                del self._data[key]
+            self._next_sweep = now + self.SWEEP_INTERVAL
+        if self.max_entries:
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+            self._prune()
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._counters.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+# Backend for any Redis-compatible server (Redis, Valkey, KeyDB, ...), shared
+# by every worker process. Values are stored as JSON. Needs the optional
+# `redis` package.
+class RedisBackend:
+    def __init__(self, url, prefix='parkright:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND = 'redis' requires the 'redis' package (pip install redis)")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        raws = self._client.mget([self._prefix + key for key in keys])
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def set_many(self, items, ttl=None):
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self._prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+        pipe.execute()
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*(self._prefix + key for key in keys))
+
+    def incr(self, key):
+        return self._client.incr(self._prefix + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(self._prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+# Cache front end used by the app: picks the backend from the config and
+# keeps hit/miss counters per key namespace, the part of the key before the
+# first ':' (availability, fragment, ...). Lookups of internal bookkeeping
+# such as version counters pass stats=False so they do not inflate the
+# ratios. With CACHE_ENABLED off every lookup misses.
+class Cache:
+    def __init__(self):
+        self.backend = MemoryBackend()
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def init_app(self, app):
+        config = app.config
+        if config['CACHE_BACKEND'] == 'redis':
+            self.backend = RedisBackend(config['CACHE_REDIS_URL'])
+        elif config['CACHE_BACKEND'] == 'memory':
+            self.backend = MemoryBackend(max_entries=config['CACHE_MAX_ENTRIES'])
+        else:
+            raise RuntimeError(f"Unknown CACHE_BACKEND {config['CACHE_BACKEND']!r}")
+        self.enabled = config['CACHE_ENABLED']
+        self.reset_stats()
+
+    def _count(self, keys, values):
+        with self._lock:
+            for key, value in zip(keys, values):
+                counts = self._stats.setdefault(key.split(':', 1)[0], [0, 0])
+                counts[value is None] += 1
+
+    def get(self, key, stats=True):
+        value = self.backend.get(key) if self.enabled else None
+        if stats:
+            self._count([key], [value])
+        return value
+
+    def get_many(self, keys, stats=True):
+        values = self.backend.get_many(keys) if self.enabled else [None] * len(keys)
+        if stats:
+            self._count(keys, values)
+        return values
+
+    def set(self, key, value, ttl=None):
+        if self.enabled:
+            self.backend.set(key, value, ttl)
+
+    def set_many(self, items, ttl=None):
+        if self.enabled and items:
+            self.backend.set_many(items, ttl)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def incr(self, key):
+        return self.backend.incr(key)
+
+    def clear(self):
+        self.backend.clear()
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self):
+        with self._lock:
+            namespaces = {
+                namespace: {
+                    'hits': hits,
+                    'misses': misses,
+                    'hit_ratio': hits / (hits + misses) if hits + misses else 0.0,
+                }
+                for namespace, (hits, misses) in sorted(self._stats.items())
+            }
+        return {
+            'backend': type(self.backend).__name__,
+            'enabled': self.enabled,
+            'namespaces': namespaces,
+        }
+
+cache = Cache()
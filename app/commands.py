@@ -0,0 +1,81 @@
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db
+from app.availability import reconcile_counters
+from app.migrations import upgrade_schema
+from app.history import rebuild_user_stats
+from app.rollups import BACKFILL_BATCH_SIZE, backfill_rollups
+from app.sweeper import expire_stale_reservations
+
+# Rebuild the per-lot spot counters from the parking_spots table
+@click.command('reconcile-counters')
+@click.option('--check', is_flag=True, help='Only report mismatches, do not fix them.')
+@with_appcontext
+def reconcile_counters_command(check):
+    mismatches = reconcile_counters(fix=not check)
+    for lot, stored, actual in mismatches:
+        click.echo(f"Lot #{lot.id}: stored {stored}, actual {actual}")
+
+    if not mismatches:
+        click.echo('All lot counters match their spots.')
+    elif check:
+        raise SystemExit(1)
+    else:
+        click.echo(f'Fixed counters for {len(mismatches)} lot(s).')
+
+# Apply schema changes to an existing database without losing data
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    changes = upgrade_schema()
+    for change in changes:
+        click.echo(change)
+    if not changes:
+        click.echo('Database schema is up to date.')
+
+    # columns added by the upgrade start at their defaults
+    if changes and reconcile_counters():
+        click.echo('Rebuilt lot counters.')
+
+# Recompute reservation durations and per-user totals from the history
+@click.command('rebuild-user-stats')
+@with_appcontext
+def rebuild_user_stats_command():
+    rebuild_user_stats()
+    click.echo('Rebuilt per-user parking totals.')
+
+# Rebuild the hourly occupancy rollups from the reservation history
+@click.command('backfill-rollups')
+@click.option('--batch-size', default=BACKFILL_BATCH_SIZE, show_default=True, help='Reservations per batch.')
+@with_appcontext
+def backfill_rollups_command(batch_size):
+    processed = backfill_rollups(
+        batch_size=batch_size,
+        progress=lambda count: click.echo(f'{count} reservations processed')
+    )
+    click.echo(f'Rebuilt occupancy rollups from {processed} reservations.')
+
+# Expire reservations that were never occupied, once or as a worker loop
+@click.command('sweep-reservations')
+@click.option('--max-age', type=int, default=None, help='Minutes before a reservation expires (default: RESERVATION_EXPIRY_MINUTES).')
+@click.option('--loop', is_flag=True, help='Keep sweeping every RESERVATION_SWEEP_INTERVAL seconds.')
+@with_appcontext
+def sweep_reservations_command(max_age, loop):
+    config = current_app.config
+    max_age = max_age if max_age is not None else config['RESERVATION_EXPIRY_MINUTES']
+    while True:
+        expired = expire_stale_reservations(max_age)
+        click.echo(f'Expired {expired} stale reservation(s).')
+        if not loop:
+            break
+        db.session.remove()
+        time.sleep(config['RESERVATION_SWEEP_INTERVAL'])
+
+def register_commands(app):
+    app.cli.add_command(reconcile_counters_command)
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(rebuild_user_stats_command)
+    app.cli.add_command(backfill_rollups_command)
+    app.cli.add_command(sweep_reservations_command)
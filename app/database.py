@@ -0,0 +1,55 @@
+from flask import current_app
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from app import db
+
+READ_ENGINE_KEY = 'sqlite_read_engine'
+
+def _pragma_statements(config, read_only=False):
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT'])}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {int(config['SQLITE_CACHE_SIZE'])}",
+        f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = 1")
+    elif config['SQLITE_JOURNAL_MODE']:
+        # the journal mode is stored in the database file, so only writers set it
+        pragmas.insert(0, f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+    return pragmas
+
+def _listen_for_connections(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+# Tune the SQLite engine of the app: PRAGMAs on every new connection and,
+# when SQLITE_READ_ONLY_CONNECTION is set, a second read-only engine that
+# execute_read() sends queries to. Other databases are left untouched.
+def configure_engine(app):
+    config = app.config
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    _listen_for_connections(engine, _pragma_statements(config))
+
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if config['SQLITE_READ_ONLY_CONNECTION'] and url.database and url.database != ':memory:':
+        read_url = url.set(database=f'file:{url.database}', query={'mode': 'ro', 'uri': 'true'})
+        read_engine = create_engine(read_url, **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        _listen_for_connections(read_engine, _pragma_statements(config, read_only=True))
+        app.extensions[READ_ENGINE_KEY] = read_engine
+
+# Run a SELECT on the read-only connection when one is configured, and on
+# the session's own connection otherwise. Returns the session Result.
+def execute_read(stmt):
+    read_engine = current_app.extensions.get(READ_ENGINE_KEY)
+    if read_engine is None:
+        return db.session.execute(stmt)
+    return db.session.execute(stmt, bind_arguments={'bind': read_engine})
@@ -0,0 +1,83 @@
+import queue
+import threading
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import db
+
+# In-process publish/subscribe bus. Each subscriber gets its own bounded
+# queue per channel (a lot id); a subscriber that falls too far behind is
+# sent a single 'reload' event instead of the backlog.
+#
+# Events only reach subscribers in the same process, so with several worker
+# processes an open spot board sees the changes made through its own worker.
+class EventBus:
+    def __init__(self, max_queue_size=256):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, channel, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(payload)
+            except queue.Full:
+                _drain(subscription)
+                subscription.put_nowait({'type': 'reload'})
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+def _drain(subscription):
+    try:
+        while True:
+            subscription.get_nowait()
+    except queue.Empty:
+        pass
+
+event_bus = EventBus()
+
+# Spot status change as pushed to the live spot board
+def spot_event(spot_id, old_status, new_status, user_email=None, parked_since=None):
+    return {
+        'type': 'status',
+        'spot_id': spot_id,
+        'old': old_status,
+        'status': new_status,
+        'user': user_email,
+        'since': parked_since.strftime('%Y-%m-%d %H:%M') if parked_since else None,
+    }
+
+# Events are held on the session and only published once the transaction
+# commits, so subscribers never see a change that was rolled back.
+PENDING_KEY = 'pending_spot_events'
+
+def publish_after_commit(lot_id, payload):
+    db.session.info.setdefault(PENDING_KEY, []).append((lot_id, payload))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_committed(session):
+    for lot_id, payload in session.info.pop(PENDING_KEY, ()):
+        event_bus.publish(lot_id, payload)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
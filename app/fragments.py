@@ -0,0 +1,34 @@
+from flask import current_app
+from markupsafe import Markup
+from app.cache import cache
+
+# Fragment cache for the per-lot cards on the dashboards. A card is rendered
+# from the lot snapshot, and cached under the lot id and a fingerprint of
+# that snapshot (see app.availability.snapshot_version). A changed lot gets
+# a new key as soon as the snapshot refreshes, in every process, so a card
+# is never staler than the snapshot itself; old cards are left to expire.
+#
+# `variant` covers whatever else the card depends on, e.g. whether the user
+# viewing it can book.
+FRAGMENT_KEY = 'fragment:{template}:{lot_id}:{version}:{variant}'
+
+def render_lot_cards(template_name, lots, variant='', cacheable=True, **context):
+    template = current_app.jinja_env.get_template(template_name)
+    if not cacheable:
+        return Markup(''.join(template.render(lot=lot, **context) for lot in lots))
+
+    keys = [
+        FRAGMENT_KEY.format(template=template_name, lot_id=lot['id'], version=lot['version'], variant=variant)
+        for lot in lots
+    ]
+    fragments = cache.get_many(keys)
+    rendered = {}
+    for index, lot in enumerate(lots):
+        if fragments[index] is None:
+            fragments[index] = template.render(lot=lot, **context)
+            rendered[keys[index]] = fragments[index]
+    cache.set_many(rendered, current_app.config['FRAGMENT_CACHE_TTL'])
+    return Markup(''.join(fragments))
+
+def init_fragments(app):
+    app.jinja_env.globals['render_lot_cards'] = render_lot_cards
@@ -0,0 +1,186 @@
+import math
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.models import db, ParkingLot
+from app.database import execute_read
+from app.availability import get_lots_snapshot
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+# In-memory grid over lot coordinates. Lots are bucketed into square cells of
+# cell_degrees, so a radius query only looks at the cells around the point
+# instead of every lot. Lots are also grouped by pin code; a pin code search
+# starts from the centre of that pin's lots.
+#
+# The index only holds positions. Counters come from the cached lots
+# snapshot at query time, so reservations never force a rebuild. Lot
+# create/edit/delete in this process mark it stale (mark_geo_changed());
+# changes made by other processes are picked up by rebuilding it from the
+# database once it is older than GEO_INDEX_TTL seconds.
+class GeoIndex:
+    def __init__(self, cell_degrees=0.05):
+        self.cell_degrees = cell_degrees
+        self._lock = threading.Lock()
+        self._cells = {}
+        self._positions = {}
+        self._by_pin = {}
+        self._built_at = None
+        self._stale = True
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    # rows are (lot_id, latitude, longitude, pin_code); lat/lon may be None
+    def build(self, rows):
+        cells, positions, by_pin = {}, {}, {}
+        for lot_id, lat, lon, pin_code in rows:
+            by_pin.setdefault(pin_code, []).append(lot_id)
+            if lat is None or lon is None:
+                continue
+            positions[lot_id] = (lat, lon)
+            cells.setdefault(self._cell(lat, lon), []).append(lot_id)
+        # swap in the finished structures; readers never see a partial index
+        self._cells, self._positions, self._by_pin = cells, positions, by_pin
+        self._built_at = time.monotonic()
+
+    def mark_stale(self):
+        self._stale = True
+
+    def needs_rebuild(self, max_age):
+        return self._stale or self._built_at is None or time.monotonic() - self._built_at >= max_age
+
+    # Rebuild from load_rows() with cells of cell_degrees when the index is
+    # stale or older than max_age seconds; concurrent callers wait for the
+    # one rebuild. The stale flag is
+    # cleared before the rows are read, so a change committed during the
+    # rebuild triggers another one.
+    def refresh(self, load_rows, max_age, cell_degrees):
+        if not self.needs_rebuild(max_age):
+            return
+        with self._lock:
+            if self.needs_rebuild(max_age):
+                self._stale = False
+                self.cell_degrees = cell_degrees
+                self.build(load_rows())
+
+    # Lots within radius_km of (lat, lon) as (lot_id, distance_km) pairs
+    def nearby(self, lat, lon, radius_km):
+        cells, positions = self._cells, self._positions
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lon_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+        min_row, min_col = self._cell(lat - lat_span, lon - lon_span)
+        max_row, max_col = self._cell(lat + lat_span, lon + lon_span)
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for lot_id in cells.get((row, col), ()):
+                    lot_lat, lot_lon = positions[lot_id]
+                    distance = haversine_km(lat, lon, lot_lat, lot_lon)
+                    if distance <= radius_km:
+                        found.append((lot_id, distance))
+        return found
+
+    def pin_lots(self, pin_code):
+        return list(self._by_pin.get(pin_code, ()))
+
+    # centre of the lots with coordinates in a pin code, or None
+    def pin_centre(self, pin_code):
+        points = [self._positions[lot_id] for lot_id in self._by_pin.get(pin_code, ()) if lot_id in self._positions]
+        if not points:
+            return None
+        return (sum(lat for lat, _ in points) / len(points),
+                sum(lon for _, lon in points) / len(points))
+
+geo_index = GeoIndex()
+
+GEO_CHANGED_KEY = 'geo_index_changed'
+
+def _load_positions():
+    return execute_read(select(
+        ParkingLot.id, ParkingLot.latitude, ParkingLot.longitude, ParkingLot.pin_code
+    )).all()
+
+def _ensure_index():
+    config = current_app.config
+    geo_index.refresh(_load_positions, config['GEO_INDEX_TTL'], config['GEO_GRID_CELL_DEGREES'])
+    return geo_index
+
+# Lot writes that add, move or remove a lot call this; the index is rebuilt
+# on the next search once the transaction commits.
+def mark_geo_changed():
+    db.session.info[GEO_CHANGED_KEY] = True
+
+@event.listens_for(Session, 'after_commit')
+def _rebuild_committed(session):
+    if session.info.pop(GEO_CHANGED_KEY, None):
+        geo_index.mark_stale()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_geo_changes(session):
+    session.info.pop(GEO_CHANGED_KEY, None)
+
+# The lots snapshot keyed by id. The memory backend hands back the same list
+# until it is invalidated, so the dict is only rebuilt when the snapshot is.
+_snapshot_by_id = (None, {})
+
+def _lots_by_id():
+    global _snapshot_by_id
+    lots = get_lots_snapshot()
+    cached_list, by_id = _snapshot_by_id
+    if cached_list is not lots:
+        by_id = {lot['id']: lot for lot in lots}
+        _snapshot_by_id = (lots, by_id)
+    return by_id
+
+# Lots near a point or a pin code, nearest first and, at the same distance,
+# the one with more free spots first. Each result is the lot snapshot plus
+# distance_km (None when the lot has no coordinates and matched by pin code
+# only). Lots without free spots are left out unless include_full is set.
+def search_lots(lat=None, lon=None, pin_code=None, radius_km=None, limit=20, include_full=False):
+    config = current_app.config
+    if radius_km is None:
+        radius_km = config['GEO_DEFAULT_RADIUS_KM']
+    radius_km = min(radius_km, config['GEO_MAX_RADIUS_KM'])
+    index = _ensure_index()
+
+    distances = {}
+    if lat is None or lon is None:
+        centre = index.pin_centre(pin_code) if pin_code else None
+        if centre:
+            lat, lon = centre
+        elif pin_code:
+            distances = {lot_id: None for lot_id in index.pin_lots(pin_code)}
+    if lat is not None and lon is not None:
+        distances = dict(index.nearby(lat, lon, radius_km))
+        if pin_code:
+            # lots in the pin code that have no coordinates yet
+            for lot_id in index.pin_lots(pin_code):
+                distances.setdefault(lot_id, None)
+
+    lots = _lots_by_id()
+    results = []
+    for lot_id, distance in distances.items():
+        lot = lots.get(lot_id)
+        if lot is None:
+            continue
+        if lot['available_spots'] <= 0 and not include_full:
+            continue
+        results.append(dict(lot, distance_km=round(distance, 3) if distance is not None else None))
+
+    results.sort(key=lambda lot: (
+        lot['distance_km'] is None,
+        lot['distance_km'] or 0.0,
+        -lot['available_spots']
+    ))
+    return results[:limit]
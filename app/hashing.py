@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Password hashing for login and registration. Hashes are deliberately
+# slow, so they run on a small process pool instead of in the request
+# worker: a burst of logins queues behind PASSWORD_HASH_WORKERS processes
+# instead of starving reserve/release traffic. At most
+# PASSWORD_HASH_MAX_PENDING hashes are queued or running at once; beyond
+# that a request waits up to PASSWORD_HASH_QUEUE_TIMEOUT seconds for a
+# slot and then gets HashingBusy. The wait is kept short on purpose: a
+# request worker blocked on it serves nothing else, so under a login rush
+# it is better to turn the excess away with a 503 than to tie up the
+# workers that reserve/release traffic needs.
+#
+# If a pool process dies (e.g. killed by the OOM killer) the whole pool is
+# broken; it is replaced and the hash retried once.
+#
+# Stored hashes carry their method and cost parameters, e.g.
+# "scrypt:32768:8:1$<salt>$<hash>", so a hash made with older settings is
+# recognised on login and replaced (see needs_rehash).
+
+HASHER_KEY = 'password_hasher'
+
+# method -> number of ':'-separated parts once every cost parameter is given
+METHOD_PARTS = {'scrypt': 4, 'pbkdf2': 3}
+
+class HashingBusy(Exception):
+    pass
+
+class PasswordHasher:
+    def __init__(self, method, salt_length=16, workers=2, max_pending=16, queue_timeout=0.5):
+        name = method.split(':')[0]
+        if METHOD_PARTS.get(name) != len(method.split(':')):
+            raise ValueError(
+                f'PASSWORD_HASH_METHOD {method!r} must spell out every cost parameter, '
+                'e.g. scrypt:32768:8:1 or pbkdf2:sha256:600000'
+            )
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                # fork where available: spawned children would re-import the
+                # app module and start a second app in every worker
+                context = None
+                if 'fork' in multiprocessing.get_all_start_methods():
+                    context = multiprocessing.get_context('fork')
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._executor
+
+    def _discard_executor(self, broken):
+        with self._executor_lock:
+            # another thread may already have replaced it
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False)
+
+    def _submit(self, func, *args):
+        executor = self._get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            return self._get_executor().submit(func, *args).result()
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy('Too many sign-ins right now. Please try again in a moment.')
+        try:
+            return self._submit(func, *args)
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        method, _, rest = password_hash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+def init_hashing(app):
+    app.extensions[HASHER_KEY] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+    )
+
+def get_hasher():
+    return current_app.extensions[HASHER_KEY]
+
+def hash_password(password):
+    return get_hasher().hash(password)
+
+# Check a password against a user's stored hash. On success, a hash made
+# with outdated settings is replaced; the caller commits.
+def check_user_password(user, password):
+    hasher = get_hasher()
+    if not hasher.verify(user.password, password):
+        return False
+    if hasher.needs_rehash(user.password):
+        user.password = hasher.hash(password)
+    return True
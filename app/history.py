@@ -0,0 +1,120 @@
+from sqlalchemy import Integer, cast, func, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload
+from app.models import db, ParkingLot, ParkingSpot, Reservation, UserLotStats
+
+# Add one closed parking session to the user's per-lot totals (an upsert).
+# Called in the same transaction that closes the reservation.
+def record_session(user_id, lot_id, cost, duration_seconds):
+    record_sessions([(user_id, lot_id, cost, duration_seconds)])
+
+# Same for many sessions at once, e.g. a bulk release: sessions are summed
+# per (user, lot) and written with a single executemany upsert.
+def record_sessions(sessions):
+    totals = {}
+    for user_id, lot_id, cost, duration_seconds in sessions:
+        entry = totals.setdefault((user_id, lot_id), [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += cost or 0.0
+        entry[2] += duration_seconds or 0
+    if not totals:
+        return
+
+    stmt = sqlite_insert(UserLotStats)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserLotStats.user_id, UserLotStats.lot_id],
+            set_={
+                'sessions': UserLotStats.sessions + stmt.excluded.sessions,
+                'total_cost': UserLotStats.total_cost + stmt.excluded.total_cost,
+                'total_seconds': UserLotStats.total_seconds + stmt.excluded.total_seconds,
+            }
+        ),
+        [
+            {'user_id': user_id, 'lot_id': lot_id, 'sessions': count, 'total_cost': cost, 'total_seconds': seconds}
+            for (user_id, lot_id), (count, cost, seconds) in totals.items()
+        ]
+    )
+
+# One page of a user's reservations, newest first, with spot and lot loaded
+# up front. Keyset pagination on id: pass the next_before of the previous
+# page to continue. Returns (reservations, next_before or None).
+def get_history_page(user_id, before_id=None, per_page=25):
+    history_query = Reservation.query.options(
+        joinedload(Reservation.spot).joinedload(ParkingSpot.lot)
+    ).filter(Reservation.user_id == user_id)
+    if before_id:
+        history_query = history_query.filter(Reservation.id < before_id)
+    reservations = history_query.order_by(Reservation.id.desc()).limit(per_page + 1).all()
+
+    next_before = None
+    if len(reservations) > per_page:
+        reservations = reservations[:per_page]
+        next_before = reservations[-1].id
+    return reservations, next_before
+
+# Per-lot totals of a user plus the overall totals, read from user_lot_stats
+def get_user_totals(user_id):
+    rows = db.session.query(
+        UserLotStats, ParkingLot.prime_location_name
+    ).outerjoin(
+        ParkingLot, ParkingLot.id == UserLotStats.lot_id
+    ).filter(
+        UserLotStats.user_id == user_id
+    ).order_by(UserLotStats.sessions.desc()).all()
+
+    per_lot = []
+    totals = {'sessions': 0, 'total_cost': 0.0, 'total_hours': 0.0}
+    for stats, lot_name in rows:
+        per_lot.append({
+            'lot_name': lot_name or f'Lot #{stats.lot_id} (deleted)',
+            'sessions': stats.sessions,
+            'total_cost': stats.total_cost,
+            'total_hours': stats.total_seconds / 3600,
+        })
+        totals['sessions'] += stats.sessions
+        totals['total_cost'] += stats.total_cost
+        totals['total_hours'] += stats.total_seconds / 3600
+    return totals, per_lot
+
+# Rebuild durations and user_lot_stats from the closed reservations. Used
+# after upgrading a database that predates the incremental totals.
+def rebuild_user_stats():
+    # older builds stored 0 for reservations that were never occupied
+    db.session.execute(
+        update(Reservation)
+        .where(Reservation.parking_timestamp == None, Reservation.duration_seconds != None)
+        .values(duration_seconds=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(Reservation)
+        .where(
+            Reservation.duration_seconds == None,
+            Reservation.parking_timestamp != None,
+            Reservation.leaving_timestamp != None
+        )
+        .values(duration_seconds=cast(
+            (func.julianday(Reservation.leaving_timestamp) - func.julianday(Reservation.parking_timestamp)) * 86400,
+            Integer
+        ))
+        .execution_options(synchronize_session=False)
+    )
+
+    db.session.execute(UserLotStats.__table__.delete())
+    db.session.execute(insert(UserLotStats).from_select(
+        ['user_id', 'lot_id', 'sessions', 'total_cost', 'total_seconds'],
+        select(
+            Reservation.user_id,
+            ParkingSpot.lot_id,
+            func.count(Reservation.id),
+            func.coalesce(func.sum(Reservation.cost), 0.0),
+            func.coalesce(func.sum(Reservation.duration_seconds), 0)
+        ).join(
+            ParkingSpot, ParkingSpot.id == Reservation.spot_id
+        ).where(
+            Reservation.parking_timestamp != None,
+            Reservation.leaving_timestamp != None
+        ).group_by(Reservation.user_id, ParkingSpot.lot_id)
+    ))
+    db.session.commit()
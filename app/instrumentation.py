@@ -0,0 +1,190 @@
+import heapq
+import threading
+import time
+from flask import (
+    before_render_template, g, has_request_context, request, request_finished,
+    request_started, template_rendered
+)
+from sqlalchemy import event
+from app.models import db
+from app.database import READ_ENGINE_KEY
+
+# Opt-in per-endpoint request metrics: SQL statement count, DB time,
+# template render time and the slowest statements seen. Enabled with
+# INSTRUMENTATION_ENABLED; requests running more than
+# INSTRUMENTATION_QUERY_BUDGET statements are logged as they happen.
+
+class EndpointStats:
+    def __init__(self):
+        self.requests = 0
+        self.total_time = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.over_budget = 0
+        # min-heap of (duration, statement), so the fastest is dropped first
+        self.slowest = []
+
+    def as_dict(self):
+        requests = self.requests or 1
+        return {
+            'requests': self.requests,
+            'total_time': self.total_time,
+            'avg_ms': self.total_time / requests * 1000,
+            'queries': self.queries,
+            'avg_queries': self.queries / requests,
+            'max_queries': self.max_queries,
+            'db_time': self.db_time,
+            'avg_db_ms': self.db_time / requests * 1000,
+            'template_time': self.template_time,
+            'avg_template_ms': self.template_time / requests * 1000,
+            'over_budget': self.over_budget,
+            'slowest': [
+                {'ms': duration * 1000, 'statement': statement}
+                for duration, statement in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+class RequestMetrics:
+    def __init__(self, query_budget=None, slow_statements=5):
+        self.query_budget = query_budget
+        self.slow_statements = slow_statements
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, elapsed, queries, db_time, template_time, statements):
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.total_time += elapsed
+            stats.queries += queries
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.db_time += db_time
+            stats.template_time += template_time
+            if self.query_budget is not None and queries > self.query_budget:
+                stats.over_budget += 1
+            for duration, statement in statements:
+                if len(stats.slowest) < self.slow_statements:
+                    heapq.heappush(stats.slowest, (duration, statement))
+                elif duration > stats.slowest[0][0]:
+                    heapq.heapreplace(stats.slowest, (duration, statement))
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+METRICS_KEY = 'request_metrics'
+
+def get_metrics(app):
+    return app.extensions.get(METRICS_KEY)
+
+# Per-request counters live on flask.g; statements run outside a request
+# (CLI commands, the sweeper thread) are not counted.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_start')
+    if not has_request_context() or not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    g.instrumentation_queries = g.get('instrumentation_queries', 0) + 1
+    g.instrumentation_db_time = g.get('instrumentation_db_time', 0.0) + duration
+    g.setdefault('instrumentation_statements', []).append((duration, statement))
+
+def _request_started(sender, **extra):
+    g.instrumentation_start = time.perf_counter()
+
+def _before_render_template(sender, template, context, **extra):
+    g.setdefault('instrumentation_render_starts', []).append(time.perf_counter())
+
+def _template_rendered(sender, template, context, **extra):
+    starts = g.get('instrumentation_render_starts')
+    if starts:
+        g.instrumentation_template_time = (
+            g.get('instrumentation_template_time', 0.0) + time.perf_counter() - starts.pop()
+        )
+
+def _request_finished(sender, response, **extra):
+    started = g.get('instrumentation_start')
+    if started is None:
+        return
+    metrics = get_metrics(sender)
+    elapsed = time.perf_counter() - started
+    queries = g.get('instrumentation_queries', 0)
+    db_time = g.get('instrumentation_db_time', 0.0)
+    endpoint = request.endpoint or 'unmatched'
+    metrics.record(
+        endpoint, elapsed, queries, db_time,
+        g.get('instrumentation_template_time', 0.0),
+        g.get('instrumentation_statements', [])
+    )
+    if metrics.query_budget is not None and queries > metrics.query_budget:
+        sender.logger.warning(
+            '%s %s (%s) ran %d SQL statements, budget is %d (%.1f ms in the database)',
+            request.method, request.path, endpoint, queries, metrics.query_budget, db_time * 1000
+        )
+
+def init_instrumentation(app):
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+    app.extensions[METRICS_KEY] = RequestMetrics(
+        query_budget=app.config['INSTRUMENTATION_QUERY_BUDGET'],
+        slow_statements=app.config['INSTRUMENTATION_SLOW_STATEMENTS']
+    )
+
+    with app.app_context():
+        engines = [db.engine]
+    if READ_ENGINE_KEY in app.extensions:
+        engines.append(app.extensions[READ_ENGINE_KEY])
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    request_started.connect(_request_started, app)
+    request_finished.connect(_request_finished, app)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+# Prometheus text exposition of the endpoint metrics and cache counters
+def prometheus_text(metrics, cache_stats, user_cache_stats):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+            lines.append(f'{name}{{{label_text}}} {value}' if label_text else f'{name} {value}')
+
+    endpoints = metrics.snapshot()
+    for name, key, kind, help_text in (
+        ('parkright_requests_total', 'requests', 'counter', 'Requests handled'),
+        ('parkright_request_seconds_total', 'total_time', 'counter', 'Time spent handling requests'),
+        ('parkright_sql_statements_total', 'queries', 'counter', 'SQL statements executed'),
+        ('parkright_sql_seconds_total', 'db_time', 'counter', 'Time spent in SQL statements'),
+        ('parkright_template_seconds_total', 'template_time', 'counter', 'Time spent rendering templates'),
+        ('parkright_requests_over_query_budget_total', 'over_budget', 'counter', 'Requests over the SQL statement budget'),
+        ('parkright_sql_statements_max', 'max_queries', 'gauge', 'Most SQL statements in a single request'),
+    ):
+        metric(name, kind, help_text, [({'endpoint': endpoint}, stats[key]) for endpoint, stats in endpoints.items()])
+
+    namespaces = cache_stats['namespaces'].items()
+    metric('parkright_cache_hits_total', 'counter', 'Cache hits',
+           [({'namespace': namespace}, stats['hits']) for namespace, stats in namespaces])
+    metric('parkright_cache_misses_total', 'counter', 'Cache misses',
+           [({'namespace': namespace}, stats['misses']) for namespace, stats in namespaces])
+    metric('parkright_user_cache_hits_total', 'counter', 'User cache hits', [({}, user_cache_stats['hits'])])
+    metric('parkright_user_cache_misses_total', 'counter', 'User cache misses', [({}, user_cache_stats['misses'])])
+    metric('parkright_user_cache_evictions_total', 'counter', 'User cache evictions', [({}, user_cache_stats['evictions'])])
+    metric('parkright_user_cache_size', 'gauge', 'Users in the cache', [({}, user_cache_stats['size'])])
+    return '\n'.join(lines) + '\n'
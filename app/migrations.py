@@ -0,0 +1,45 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+from app.models import db
+
+# SQL run once right after a column is added to an existing table
+COLUMN_BACKFILLS = {
+    # treat pending reservations from before created_at existed as made now
+    ('reservations', 'created_at'):
+        "UPDATE reservations SET created_at = COALESCE(parking_timestamp, CURRENT_TIMESTAMP) "
+        "WHERE created_at IS NULL",
+}
+
+# Bring an existing database up to the current models without dropping data:
+# creates missing tables, adds missing columns and creates missing indexes.
+# New columns must be nullable or carry a server_default, since SQLite can
+# only add columns that way. Returns a description of every change applied.
+def upgrade_schema():
+    changes = []
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                table.create(conn)
+                changes.append(f'created table {table.name}')
+                continue
+
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {ddl}'))
+                    changes.append(f'added column {table.name}.{column.name}')
+                    backfill = COLUMN_BACKFILLS.get((table.name, column.name))
+                    if backfill:
+                        conn.execute(text(backfill))
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    changes.append(f'created index {index.name}')
+
+    return changes
@@ -27,6 +27,15 @@ class ParkingLot(db.Model):
     address = db.Column(db.String(200), nullable=False)
     pin_code = db.Column(db.String(10), nullable=False)
     max_spots = db.Column(db.Integer, nullable=False)
+    # optional position, used by the nearby-lot search in app.geo
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+
+    # live spot counters, kept in sync with parking_spots by app.availability
+    available_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    reserved_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    maintenance_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     spots = db.relationship('ParkingSpot', backref='lot', cascade='all, delete-orphan', lazy=True)
 
@@ -36,12 +45,24 @@ class ParkingLot(db.Model):
 # parking spot model
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spots'
+    __table_args__ = (
+        # free-spot lookups per lot (allocation, counters)
+        db.Index('ix_parking_spots_lot_id_status', 'lot_id', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), nullable=False)
-    status = db.Column(db.String(1), nullable=False, default='A')  # A = Available, O = Occupied
+    status = db.Column(db.String(1), nullable=False, default='A')  # A = Available, R = Reserved, O = Occupied, M = Maintenance
 
     reservations = db.relationship('Reservation', backref='spot', lazy=True)
+    # the open reservation of the spot, if any; loads one row instead of the
+    # whole history (served by ix_reservations_spot_id_leaving_timestamp)
+    current_reservation = db.relationship(
+        'Reservation',
+        primaryjoin='and_(ParkingSpot.id == Reservation.spot_id, Reservation.leaving_timestamp == None)',
+        uselist=False,
+        viewonly=True
+    )
 
     def __repr__(self):
         return f"<Spot {self.id} in Lot {self.lot_id} - Status {self.status}>"
@@ -49,24 +70,81 @@ class ParkingSpot(db.Model):
 # reservation model
 class Reservation(db.Model):
     __tablename__ = 'reservations'
+    __table_args__ = (
+        # active reservation of a user / of a spot (leaving_timestamp IS NULL)
+        db.Index('ix_reservations_user_id_leaving_timestamp', 'user_id', 'leaving_timestamp'),
+        db.Index('ix_reservations_spot_id_leaving_timestamp', 'spot_id', 'leaving_timestamp'),
+        # reserved but not yet occupied, oldest first (expiry sweeps)
+        db.Index(
+            'ix_reservations_pending_created_at', 'created_at',
+            sqlite_where=db.text('parking_timestamp IS NULL AND leaving_timestamp IS NULL')
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     spot_id = db.Column(db.Integer, db.ForeignKey('parking_spots.id'), nullable=False)
     
+    created_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
     parking_timestamp = db.Column(db.DateTime, nullable=True)
     leaving_timestamp = db.Column(db.DateTime, nullable=True)
 
     cost = db.Column(db.Float, nullable=True)
+    # stored when the reservation is closed, so history pages skip the arithmetic
+    duration_seconds = db.Column(db.Integer, nullable=True)
+
+    @property
+    def is_expired(self):
+        return self.leaving_timestamp is not None and self.parking_timestamp is None
 
     @property
     def duration(self):
-        if self.parking_timestamp and self.leaving_timestamp:
-            delta = self.leaving_timestamp - self.parking_timestamp
-            hours, remainder = divmod(delta.total_seconds(), 3600)
+        if self.duration_seconds is not None:
+            seconds = self.duration_seconds
+        elif self.parking_timestamp and self.leaving_timestamp:
+            seconds = (self.leaving_timestamp - self.parking_timestamp).total_seconds()
+        else:
+            seconds = None
+        if seconds is not None:
+            hours, remainder = divmod(seconds, 3600)
             minutes, _ = divmod(remainder, 60)
             return f"{int(hours)}h {int(minutes)}m"
         return "N/A"
 
     def __repr__(self):
         return f"<Reservation User:{self.user_id} Spot:{self.spot_id}>"
+
+# per-user, per-lot parking totals, updated whenever a reservation is closed
+class UserLotStats(db.Model):
+    __tablename__ = 'user_lot_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    total_cost = db.Column(db.Float, nullable=False, default=0.0)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserLotStats User:{self.user_id} Lot:{self.lot_id}>"
+
+# occupied minutes and sessions started, per lot per clock hour
+class OccupancyRollup(db.Model):
+    __tablename__ = 'occupancy_rollups'
+    __table_args__ = (
+        # date-range reports over every lot, answered from the index alone
+        db.Index(
+            'ix_occupancy_rollups_hour', 'hour', 'lot_id',
+            'sessions', 'occupied_minutes', 'dwell_minutes', 'revenue'
+        ),
+    )
+
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)  # start of the hour, UTC
+    occupied_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    # sessions that started in this hour: their total length and what they were billed
+    dwell_minutes = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
+    def __repr__(self):
+        return f"<OccupancyRollup Lot:{self.lot_id} {self.hour:%Y-%m-%d %H}:00>"
@@ -0,0 +1,94 @@
+from datetime import datetime
+from sqlalchemy import update
+from app.models import db, Reservation
+from app.availability import record_transition
+from app.billing import compute_cost
+from app.history import record_session
+from app.rollups import record_occupancy
+from app.events import publish_after_commit, spot_event
+from app.allocator import allocate_spot
+
+# Raised by the user-facing operations below when the request cannot be
+# carried out; the message is meant to be shown to the user.
+class ParkingError(Exception):
+    pass
+
+def get_active_reservation(user_id):
+    return Reservation.query.filter_by(user_id=user_id, leaving_timestamp=None).first()
+
+# Book a free spot in a lot for a user. The caller commits.
+def reserve_spot(user, lot_id):
+    if get_active_reservation(user.id):
+        raise ParkingError('You already have an active reservation.')
+
+    spot_id = allocate_spot(lot_id)
+    if not spot_id:
+        raise ParkingError('Sorry, no spots are available in this lot.')
+
+    reservation = Reservation(user_id=user.id, spot_id=spot_id)
+    db.session.add(reservation)
+    publish_after_commit(lot_id, spot_event(spot_id, 'A', 'R', user_email=user.email))
+    return reservation
+
+# User arrived at a reserved spot. The caller commits.
+def occupy_spot(reservation, user):
+    if (reservation.user_id != user.id or reservation.leaving_timestamp is not None
+            or reservation.spot.status != 'R'):
+        raise ParkingError('This reservation cannot be occupied at this time.')
+    if not occupy_reservation(reservation, user_email=user.email):
+        raise ParkingError('This reservation has expired. Please book a spot again.')
+
+# User leaves an occupied spot and is billed. The caller commits.
+def release_spot(reservation, user):
+    if (reservation.user_id != user.id or reservation.leaving_timestamp is not None
+            or reservation.spot.status != 'O'):
+        raise ParkingError('This reservation cannot be released at this time.')
+    close_reservation(reservation)
+
+# Start the parking timer of a reserved spot. The UPDATE is guarded so a
+# reservation expired by the sweeper in the meantime cannot be occupied.
+# Returns False when that happened. The caller commits.
+def occupy_reservation(reservation, user_email=None):
+    started = db.session.execute(
+        update(Reservation)
+        .where(
+            Reservation.id == reservation.id,
+            Reservation.parking_timestamp == None,
+            Reservation.leaving_timestamp == None
+        )
+        .values(parking_timestamp=datetime.utcnow())
+    ).rowcount
+    if not started:
+        return False
+
+    spot = reservation.spot
+    spot.status = 'O'
+    record_transition(spot.lot_id, 'R', 'O')
+    publish_after_commit(spot.lot_id, spot_event(
+        spot.id, 'R', 'O',
+        user_email=user_email,
+        parked_since=reservation.parking_timestamp
+    ))
+    return True
+
+# End an occupied reservation: stamp the leaving time, bill it, free the
+# spot and add the session to the user's totals and the hourly occupancy
+# rollups. The caller commits.
+def close_reservation(reservation):
+    spot = reservation.spot
+    reservation.leaving_timestamp = datetime.utcnow()
+
+    reservation.cost = compute_cost(
+        reservation.parking_timestamp,
+        reservation.leaving_timestamp,
+        spot.lot.price_per_hour
+    )
+    reservation.duration_seconds = int(
+        (reservation.leaving_timestamp - reservation.parking_timestamp).total_seconds()
+    )
+
+    spot.status = 'A'
+    record_transition(spot.lot_id, 'O', 'A')
+    publish_after_commit(spot.lot_id, spot_event(spot.id, 'O', 'A'))
+    record_session(reservation.user_id, spot.lot_id, reservation.cost, reservation.duration_seconds)
+    record_occupancy(spot.lot_id, reservation.parking_timestamp, reservation.leaving_timestamp, reservation.cost)
@@ -0,0 +1,40 @@
+from sqlalchemy import delete, exists, func, insert, select
+from app.models import db, ParkingSpot, Reservation
+from app.availability import adjust_counters
+
+# rows per executemany batch when creating spots
+BATCH_SIZE = 1000
+
+# Create `count` available spots in a lot using batched bulk INSERTs.
+# The caller commits, so the whole provisioning is one transaction.
+def add_spots(lot_id, count):
+    for start in range(0, count, BATCH_SIZE):
+        batch = min(BATCH_SIZE, count - start)
+        db.session.execute(insert(ParkingSpot), [{'lot_id': lot_id, 'status': 'A'}] * batch)
+    adjust_counters(lot_id, {'A': count})
+
+# Available spots of a lot that have never been reserved
+def _removable_spot_ids(lot_id):
+    return select(ParkingSpot.id).where(
+        ParkingSpot.lot_id == lot_id,
+        ParkingSpot.status == 'A',
+        ~exists().where(Reservation.spot_id == ParkingSpot.id)
+    )
+
+# Delete `count` unused spots from a lot with a single set-based DELETE.
+# Returns False, without touching anything, when the lot does not have
+# that many spots that are free and have no reservation history.
+def remove_spots(lot_id, count):
+    removable = db.session.execute(
+        select(func.count()).select_from(_removable_spot_ids(lot_id).subquery())
+    ).scalar()
+    if removable < count:
+        return False
+
+    db.session.execute(
+        delete(ParkingSpot)
+        .where(ParkingSpot.id.in_(_removable_spot_ids(lot_id).limit(count)))
+        .execution_options(synchronize_session=False)
+    )
+    adjust_counters(lot_id, {'A': -count})
+    return True
@@ -0,0 +1,149 @@
+from datetime import timedelta
+from sqlalchemy import select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, OccupancyRollup, ParkingSpot, Reservation
+from app.database import execute_read
+
+BACKFILL_BATCH_SIZE = 5000
+
+def _hour_start(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+# Split [start, end) into clock hours: yields (hour_start, minutes in that hour)
+def hour_buckets(start, end):
+    hour = _hour_start(start)
+    while hour < end:
+        next_hour = hour + timedelta(hours=1)
+        minutes = (min(end, next_hour) - max(start, hour)).total_seconds() / 60
+        if minutes > 0:
+            yield hour, minutes
+        hour = next_hour
+
+# Add (lot_id, hour) -> [minutes, sessions, dwell minutes, revenue] rows to
+# the rollup table
+def _upsert(rows):
+    if not rows:
+        return
+    stmt = sqlite_insert(OccupancyRollup)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[OccupancyRollup.lot_id, OccupancyRollup.hour],
+            set_={
+                'occupied_minutes': OccupancyRollup.occupied_minutes + stmt.excluded.occupied_minutes,
+                'sessions': OccupancyRollup.sessions + stmt.excluded.sessions,
+                'dwell_minutes': OccupancyRollup.dwell_minutes + stmt.excluded.dwell_minutes,
+                'revenue': OccupancyRollup.revenue + stmt.excluded.revenue,
+            }
+        ),
+        [
+            {
+                'lot_id': lot_id, 'hour': hour, 'occupied_minutes': minutes,
+                'sessions': sessions, 'dwell_minutes': dwell, 'revenue': revenue
+            }
+            for (lot_id, hour), (minutes, sessions, dwell, revenue) in rows.items()
+        ]
+    )
+
+# A session counts, with its length and cost, in the hour it started; its
+# occupied minutes go to every hour it spans
+def _accumulate(rows, lot_id, start, end, cost):
+    entry = rows.setdefault((lot_id, _hour_start(start)), [0.0, 0, 0.0, 0.0])
+    entry[1] += 1
+    entry[2] += (end - start).total_seconds() / 60
+    entry[3] += cost or 0.0
+    for hour, minutes in hour_buckets(start, end):
+        rows.setdefault((lot_id, hour), [0.0, 0, 0.0, 0.0])[0] += minutes
+
+# Add one closed parking session to the rollups. Called in the same
+# transaction that closes the reservation.
+def record_occupancy(lot_id, parking_timestamp, leaving_timestamp, cost):
+    record_occupancies([(lot_id, parking_timestamp, leaving_timestamp, cost)])
+
+# Same for many sessions at once, written with a single upsert
+def record_occupancies(sessions):
+    rows = {}
+    for lot_id, parking_timestamp, leaving_timestamp, cost in sessions:
+        _accumulate(rows, lot_id, parking_timestamp, leaving_timestamp, cost)
+    _upsert(rows)
+
+# Replay closed sessions into the rollups in id-ordered batches, reading
+# through `reader` and committing after each batch when `commit` is set.
+def _replay(reader, batch_size, progress, commit):
+    last_id = 0
+    processed = 0
+    while True:
+        batch = reader.execute(
+            select(
+                Reservation.id, ParkingSpot.lot_id, Reservation.parking_timestamp,
+                Reservation.leaving_timestamp, Reservation.cost
+            ).join(
+                ParkingSpot, ParkingSpot.id == Reservation.spot_id
+            ).where(
+                Reservation.id > last_id,
+                Reservation.parking_timestamp != None,
+                Reservation.leaving_timestamp != None
+            ).order_by(Reservation.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return processed
+
+        rows = {}
+        for reservation_id, lot_id, parking_timestamp, leaving_timestamp, cost in batch:
+            _accumulate(rows, lot_id, parking_timestamp, leaving_timestamp, cost)
+        _upsert(rows)
+        if commit:
+            db.session.commit()
+
+        last_id = batch[-1][0]
+        processed += len(batch)
+        if progress:
+            progress(processed)
+
+# Rebuild the rollups from the reservation history.
+#
+# In WAL mode the replay commits after every batch so writers are never
+# blocked for long. The rollups are emptied under the write lock (BEGIN
+# IMMEDIATE), and a second connection opens its read snapshot before that
+# lock is released. No close can commit in between, so every session is
+# counted exactly once: by the replay if it is in the snapshot, live by
+# record_occupancy otherwise.
+#
+# Other journal modes have no snapshot reads (an open reader blocks the
+# writer's commit), so there the whole rebuild is a single transaction and
+# writers wait for it, up to SQLITE_BUSY_TIMEOUT.
+def backfill_rollups(batch_size=BACKFILL_BATCH_SIZE, progress=None):
+    db.session.commit()
+    wal = db.session.execute(text('PRAGMA journal_mode')).scalar().lower() == 'wal'
+    db.session.commit()
+    if not wal:
+        db.session.execute(text('BEGIN IMMEDIATE'))
+        db.session.execute(OccupancyRollup.__table__.delete())
+        processed = _replay(db.session, batch_size, progress, commit=False)
+        db.session.commit()
+        return processed
+
+    reader = db.engine.connect()
+    try:
+        db.session.execute(text('BEGIN IMMEDIATE'))
+        db.session.execute(OccupancyRollup.__table__.delete())
+        reader.exec_driver_sql('BEGIN')
+        reader.execute(select(Reservation.id).limit(1)).all()  # takes the snapshot
+        db.session.commit()
+        return _replay(reader, batch_size, progress, commit=True)
+    finally:
+        reader.close()
+
+# Hourly occupancy of a lot over [start, end), read from the rollups only
+def lot_occupancy(lot_id, start, end):
+    rows = execute_read(
+        select(OccupancyRollup.hour, OccupancyRollup.occupied_minutes, OccupancyRollup.sessions)
+        .where(
+            OccupancyRollup.lot_id == lot_id,
+            OccupancyRollup.hour >= start,
+            OccupancyRollup.hour < end
+        ).order_by(OccupancyRollup.hour)
+    ).all()
+    return [
+        {'hour': hour.isoformat(), 'occupied_minutes': round(minutes, 1), 'sessions': sessions}
+        for hour, minutes, sessions in rows
+    ]
@@ -1,9 +1,10 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User
 from app import db
 from app import login_manager
+from app.user_cache import user_cache
+from app.hashing import HashingBusy, check_user_password, hash_password
 
 main = Blueprint('main', __name__)
 
@@ -15,7 +16,16 @@ auth = Blueprint('auth', __name__)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        # attach the cached copy to this request's session without a query
+        return db.session.merge(cached, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache.put(user)
+    return user
 
 @auth.route('/register', methods=['GET', 'POST'])
 def register():
@@ -29,10 +39,16 @@ def register():
             flash('Email already registered.', 'danger')
             return redirect(url_for('auth.register'))
 
+        try:
+            password_hash = hash_password(password)
+        except HashingBusy as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('auth.register'))
+
         new_user = User(
             email=email,
             full_name=full_name,    
-            password=generate_password_hash(password),
+            password=password_hash,
             is_admin=False
         )
         db.session.add(new_user)
@@ -48,7 +64,15 @@ def login():
         password = request.form['password']
         user = User.query.filter_by(email=email).first()
 
-        if user and check_password_hash(user.password, password):
+        try:
+            valid = user is not None and check_user_password(user, password)
+        except HashingBusy as e:
+            flash(str(e), 'danger')
+            return render_template('login.html', title='User Login'), 503
+
+        if valid:
+            # saves a rehashed password, if any
+            db.session.commit()
             login_user(user)
             if user.is_admin:
                 return redirect(url_for('admin.dashboard'))
@@ -0,0 +1,106 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app.models import db, ParkingSpot, Reservation
+from app.availability import record_transition
+from app.events import publish_after_commit, spot_event
+
+SWEEP_BATCH_SIZE = 500
+
+# Expire reservations that were never occupied within max_age_minutes:
+# the reservation is closed without a charge and its spot goes back to 'A'.
+#
+# Candidates are found through the partial index on pending reservations'
+# created_at, so a sweep only touches stale rows. Each batch is two guarded
+# UPDATEs committed together; a reservation occupied in the meantime no
+# longer matches the guards and is left alone. Returns the number expired.
+def expire_stale_reservations(max_age_minutes, batch_size=SWEEP_BATCH_SIZE):
+    cutoff = datetime.utcnow() - timedelta(minutes=max_age_minutes)
+    expired = 0
+
+    while True:
+        reservation_ids = db.session.execute(
+            select(Reservation.id).where(
+                Reservation.parking_timestamp == None,
+                Reservation.leaving_timestamp == None,
+                Reservation.created_at < cutoff
+            ).order_by(Reservation.created_at).limit(batch_size)
+        ).scalars().all()
+        if not reservation_ids:
+            break
+
+        now = datetime.utcnow()
+        spot_ids = db.session.execute(
+            update(Reservation)
+            .where(
+                Reservation.id.in_(reservation_ids),
+                Reservation.parking_timestamp == None,
+                Reservation.leaving_timestamp == None
+            )
+            .values(leaving_timestamp=now)
+            .returning(Reservation.spot_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+
+        freed = []
+        if spot_ids:
+            freed = db.session.execute(
+                update(ParkingSpot)
+                .where(ParkingSpot.id.in_(spot_ids), ParkingSpot.status == 'R')
+                .values(status='A')
+                .returning(ParkingSpot.id, ParkingSpot.lot_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+        for lot_id, count in Counter(lot_id for _, lot_id in freed).items():
+            record_transition(lot_id, 'R', 'A', count)
+        for spot_id, lot_id in freed:
+            publish_after_commit(lot_id, spot_event(spot_id, 'R', 'A'))
+        db.session.commit()
+
+        expired += len(spot_ids)
+        if len(reservation_ids) < batch_size:
+            break
+    return expired
+
+# Daemon thread that runs a sweep every RESERVATION_SWEEP_INTERVAL seconds
+class ReservationSweeper:
+    def __init__(self, app):
+        self.app = app
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='reservation-sweeper', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def sweep(self):
+        with self.app.app_context():
+            return expire_stale_reservations(self.app.config['RESERVATION_EXPIRY_MINUTES'])
+
+    def _run(self):
+        while not self._stop.wait(self.app.config['RESERVATION_SWEEP_INTERVAL']):
+            try:
+                expired = self.sweep()
+                if expired:
+                    self.app.logger.info('Expired %d stale reservations', expired)
+            except Exception:
+                self.app.logger.exception('Reservation sweep failed')
+
+# Start the sweeper thread for a serving process. create_app does not, so
+# CLI commands, create_db.py and scripts never sweep; app.py calls this
+# before app.run(). Returns the sweeper, or None when it is disabled.
+def start_sweeper(app):
+    if not app.config['RESERVATION_SWEEPER_ENABLED'] or app.testing:
+        return None
+    sweeper = app.extensions.get('reservation_sweeper')
+    if sweeper is None:
+        sweeper = ReservationSweeper(app)
+        app.extensions['reservation_sweeper'] = sweeper
+        sweeper.start()
+    return sweeper
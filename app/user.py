@@ -1,7 +1,12 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app.models import db, ParkingLot, ParkingSpot, Reservation
-from datetime import datetime
+from app.models import db, Reservation
+from app.availability import get_lots_snapshot
+from app.geo import search_lots
+from app.history import get_history_page, get_user_totals
+from app.parking import (
+    ParkingError, get_active_reservation, occupy_spot, release_spot, reserve_spot
+)
 
 user = Blueprint('user', __name__, url_prefix='/user')
 
@@ -9,49 +14,35 @@ user = Blueprint('user', __name__, url_prefix='/user')
 @user.route('/dashboard')
 @login_required
 def dashboard():
-    active_reservation = Reservation.query.filter(
-        Reservation.user_id == current_user.id,
-        Reservation.leaving_timestamp == None
-    ).first()
+    active_reservation = get_active_reservation(current_user.id)
 
-    lots = ParkingLot.query.order_by(ParkingLot.id).all()
-    lots_data = []
-    for lot in lots:
-        available_spots = ParkingSpot.query.filter_by(lot_id=lot.id, status='A').count()
-        lots_data.append({
-            'details': lot,
-            'available_spots': available_spots
-        })
+    # ?pin= narrows the list to lots near that pin code, nearest first
+    pin_code = request.args.get('pin', '').strip()
+    if pin_code:
+        lots = search_lots(pin_code=pin_code, include_full=True)
+    else:
+        lots = get_lots_snapshot()
 
     return render_template(
         'user/dashboard.html', 
         active_reservation=active_reservation, 
-        lots_data=lots_data
+        lots=lots,
+        pin_code=pin_code
     )
 
 # Reserve spot
 @user.route('/reserve', methods=['POST'])
 @login_required
 def reserve():
-    # backend validation
-    if Reservation.query.filter_by(user_id=current_user.id, leaving_timestamp=None).first():
-        flash('You already have an active reservation.', 'danger')
+    lot_id = request.form.get('lot_id', type=int)
+    try:
+        new_reservation = reserve_spot(current_user, lot_id)
+    except ParkingError as error:
+        flash(str(error), 'danger')
         return redirect(url_for('user.dashboard'))
+    db.session.commit()
 
-    lot_id = request.form.get('lot_id')
-    first_available_spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='A').first()
-
-    if first_available_spot:
-        first_available_spot.status = 'R'
-        
-        new_reservation = Reservation(user_id=current_user.id, spot_id=first_available_spot.id)
-        db.session.add(new_reservation)
-        db.session.commit()
-        
-        return redirect(url_for('user.reservation_confirmation', reservation_id=new_reservation.id))
-    else:
-        flash('Sorry, no spots are available in this lot.', 'danger')
-        return redirect(url_for('user.dashboard'))
+    return redirect(url_for('user.reservation_confirmation', reservation_id=new_reservation.id))
 
 # Reservation page
 @user.route('/reserve/<int:reservation_id>')
@@ -69,12 +60,11 @@ def reservation_confirmation(reservation_id):
 @login_required
 def occupy(reservation_id):
     reservation = Reservation.query.get_or_404(reservation_id)
-    if reservation.user_id != current_user.id or reservation.spot.status != 'R':
-        flash('This reservation cannot be occupied at this time.', 'danger')
+    try:
+        occupy_spot(reservation, current_user)
+    except ParkingError as error:
+        flash(str(error), 'danger')
         return redirect(url_for('user.dashboard'))
-
-    reservation.spot.status = 'O'
-    reservation.parking_timestamp = datetime.utcnow()
     db.session.commit()
     
     flash('Spot occupied successfully! The parking timer has started.', 'success')
@@ -85,27 +75,31 @@ def occupy(reservation_id):
 @login_required
 def release(reservation_id):
     reservation = Reservation.query.get_or_404(reservation_id)
-    if reservation.user_id != current_user.id or reservation.spot.status != 'O':
-        flash('This reservation cannot be released at this time.', 'danger')
+    try:
+        release_spot(reservation, current_user)
+    except ParkingError as error:
+        flash(str(error), 'danger')
         return redirect(url_for('user.dashboard'))
-    
-    # cost calculation logic for milestone
-    reservation.leaving_timestamp = datetime.utcnow()
-    
-    duration_seconds = (reservation.leaving_timestamp - reservation.parking_timestamp).total_seconds()
-    duration_hours = max(duration_seconds / 3600, 1/60)
-    cost = duration_hours * reservation.spot.lot.price_per_hour
-    reservation.cost = round(cost, 2)
-
-    reservation.spot.status = 'A'
     db.session.commit()
     
     flash(f'Spot released. Your total cost is ₹{reservation.cost:.2f}.', 'success')
     return redirect(url_for('user.history'))
 
 # View Parking History
+HISTORY_PER_PAGE = 25
+
 @user.route('/history')
 @login_required
 def history():
-    user_reservations = Reservation.query.filter_by(user_id=current_user.id).order_by(Reservation.id.desc()).all()
-    return render_template('user/history.html', reservations=user_reservations)
+    before_id = request.args.get('before', type=int)
+    user_reservations, next_before = get_history_page(current_user.id, before_id, HISTORY_PER_PAGE)
+
+    totals, lot_totals = get_user_totals(current_user.id)
+    return render_template(
+        'user/history.html',
+        reservations=user_reservations,
+        totals=totals,
+        lot_totals=lot_totals,
+        next_before=next_before,
+        is_first_page=not before_id
+    )
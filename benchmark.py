@@ -0,0 +1,576 @@
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import before_render_template, template_rendered
+from sqlalchemy import event, insert, select
+from config import Config
+from app import create_app, db
+from app.models import User, ParkingLot, ParkingSpot, Reservation
+from app.cache import cache
+from app.hashing import get_hasher, hash_password
+from app.migrations import upgrade_schema
+from app.allocator import allocate_spot
+from app.availability import count_spots_by_status, lot_counts
+from app.provisioning import add_spots
+
+# In-process load benchmark. Seeds a fresh database through create_app,
+# replays mixed user and admin traffic, logins included, against the Flask test client from
+# several threads and reports latency percentiles, throughput, SQL
+# statements per request, template render time and lock errors. Results
+# can be saved as a JSON baseline and later runs compared against it:
+#
+#   python benchmark.py --output baseline.json
+#   python benchmark.py --compare baseline.json
+#
+# --provisioning instead times creating, growing and shrinking one large lot
+# through the admin lot form, and --allocation measures reservations/sec
+# when --workers threads claim every spot of one large lot.
+
+USER_PASSWORD = 'bench-password'
+ADMIN_EMAIL = 'bench-admin@example.com'
+
+# relative weight of each kind of traffic
+TRAFFIC_MIX = {
+    'dashboard': 45,
+    'history': 10,
+    'cycle': 30,  # reserve -> occupy -> release
+    'admin': 15,
+    'login': 5,  # fresh sign-in, pays for a password hash
+}
+
+# SQLite's own defaults, for measuring what the tuned PRAGMAs in config.py
+# buy; 5000 ms is the busy timeout Python's sqlite3 sets on its own
+SQLITE_DEFAULTS = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_BUSY_TIMEOUT': 5000,
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_CACHE_SIZE': -2000,
+    'SQLITE_MMAP_SIZE': 0,
+}
+
+def make_config(db_path, hash_workers=None, pragmas=True, cache_enabled=True):
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        RESERVATION_SWEEPER_ENABLED = False
+        PASSWORD_HASH_WORKERS = Config.PASSWORD_HASH_WORKERS if hash_workers is None else hash_workers
+        CACHE_ENABLED = cache_enabled
+    if not pragmas:
+        for key, value in SQLITE_DEFAULTS.items():
+            setattr(BenchmarkConfig, key, value)
+    return BenchmarkConfig
+
+HISTORY_BATCH_SIZE = 10000
+
+def seed(app, lots, spots, users, history=0):
+    with app.app_context():
+        upgrade_schema()
+        # one hash for everyone; hashing K passwords would dominate seeding
+        password = hash_password(USER_PASSWORD)
+        rows = [
+            {'email': f'bench{i}@example.com', 'full_name': f'Bench User {i}', 'password': password, 'is_admin': False}
+            for i in range(users)
+        ]
+        rows.append({'email': ADMIN_EMAIL, 'full_name': 'Bench Admin', 'password': password, 'is_admin': True})
+        db.session.execute(insert(User), rows)
+
+        for i in range(lots):
+            lot = ParkingLot(
+                prime_location_name=f'Bench Lot {i}',
+                address=f'{i} Benchmark Road',
+                pin_code=str(560001 + i % 50),
+                price_per_hour=20.0 + i % 5 * 10,
+                max_spots=spots,
+                latitude=12.9 + (i % 20) * 0.01,
+                longitude=77.5 + (i // 20) * 0.01
+            )
+            db.session.add(lot)
+            db.session.flush()
+            add_spots(lot.id, spots)
+        db.session.commit()
+
+        if history:
+            seed_history(history)
+
+# Closed reservations spread over every spot and user, so pages that touch
+# reservations can be measured against a long history
+def seed_history(count):
+    rng = random.Random(0)
+    spot_ids = db.session.execute(select(ParkingSpot.id)).scalars().all()
+    user_ids = db.session.execute(select(User.id).where(User.is_admin == False)).scalars().all()
+    now = datetime.utcnow()
+    for start in range(0, count, HISTORY_BATCH_SIZE):
+        rows = []
+        for _ in range(min(HISTORY_BATCH_SIZE, count - start)):
+            parked = now - timedelta(minutes=rng.randint(60, 365 * 24 * 60))
+            seconds = rng.randint(300, 4 * 3600)
+            rows.append({
+                'user_id': rng.choice(user_ids),
+                'spot_id': rng.choice(spot_ids),
+                'created_at': parked,
+                'parking_timestamp': parked,
+                'leaving_timestamp': parked + timedelta(seconds=seconds),
+                'duration_seconds': seconds,
+                'cost': round(seconds / 3600 * 30, 2),
+            })
+        db.session.execute(insert(Reservation), rows)
+        db.session.commit()
+
+# Counts SQL statements and template render time per thread, and lock
+# errors across the engine
+class SQLCounter:
+    def __init__(self, app, engine):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.lock_errors = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+        event.listen(engine, 'handle_error', self._on_error)
+        before_render_template.connect(self._on_render_start, app, weak=False)
+        template_rendered.connect(self._on_rendered, app, weak=False)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.statements = getattr(self._local, 'statements', 0) + 1
+
+    def _on_error(self, context):
+        if 'database is locked' in str(context.original_exception):
+            with self._lock:
+                self.lock_errors += 1
+
+    def _on_render_start(self, sender, **extra):
+        self._local.render_started = time.perf_counter()
+
+    def _on_rendered(self, sender, **extra):
+        self._local.render_time += time.perf_counter() - self._local.render_started
+
+    def reset(self):
+        self._local.statements = 0
+        self._local.render_time = 0.0
+
+    @property
+    def statements(self):
+        return getattr(self._local, 'statements', 0)
+
+    @property
+    def render_time(self):
+        return getattr(self._local, 'render_time', 0.0)
+
+class Worker(threading.Thread):
+    def __init__(self, app, counter, emails, lot_ids, operations, rng_seed, mix):
+        super().__init__(daemon=True)
+        self.mix = mix
+        self.emails = emails
+        self.app = app
+        self.counter = counter
+        self.lot_ids = lot_ids
+        self.operations = operations
+        self.rng = random.Random(rng_seed)
+        self.samples = []
+        self.clients = [self._login(email) for email in emails]
+        self.admin = self._login(ADMIN_EMAIL)
+
+    def _login(self, email):
+        client = self.app.test_client()
+        response = client.post('/login', data={'email': email, 'password': USER_PASSWORD})
+        if response.status_code != 302:
+            raise RuntimeError(f'login failed for {email}')
+        return client
+
+    def _request(self, name, client, method, url, **kwargs):
+        self.counter.reset()
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.samples.append((name, elapsed, self.counter.statements, self.counter.render_time, response.status_code))
+        return response
+
+    def _cycle(self, client):
+        response = self._request('reserve', client, 'POST', '/user/reserve', data={'lot_id': self.rng.choice(self.lot_ids)})
+        match = re.search(r'/user/reserve/(\d+)', response.headers.get('Location', ''))
+        if not match:
+            return  # lot full or an earlier reservation still open
+        reservation_id = match.group(1)
+        self._request('occupy', client, 'POST', f'/user/occupy/{reservation_id}')
+        self._request('release', client, 'POST', f'/user/release/{reservation_id}')
+
+    def _admin_page(self):
+        page = self.rng.choice(('dashboard', 'users', 'reservations', 'spots'))
+        if page == 'spots':
+            url = f'/admin/lots/{self.rng.choice(self.lot_ids)}/spots'
+        else:
+            url = f'/admin/{page}'
+        self._request(f'admin_{page}', self.admin, 'GET', url)
+
+    def run(self):
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        for _ in range(self.operations):
+            kind = self.rng.choices(kinds, weights)[0]
+            client = self.rng.choice(self.clients)
+            if kind == 'dashboard':
+                self._request('dashboard', client, 'GET', '/user/dashboard')
+            elif kind == 'history':
+                self._request('history', client, 'GET', '/user/history')
+            elif kind == 'cycle':
+                self._cycle(client)
+            elif kind == 'login':
+                self._request('login', self.app.test_client(), 'POST', '/login',
+                              data={'email': self.rng.choice(self.emails), 'password': USER_PASSWORD})
+            else:
+                self._admin_page()
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def summarize(samples):
+    timings = sorted(elapsed for _, elapsed, _, _, _ in samples)
+    return {
+        'count': len(samples),
+        'errors': sum(1 for _, _, _, _, status in samples if status >= 500),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'statements_per_request': round(sum(s for _, _, s, _, _ in samples) / max(len(samples), 1), 2),
+        'render_ms': round(sum(r for _, _, _, r, _ in samples) / max(len(samples), 1) * 1000, 3),
+    }
+
+def run_benchmark(args):
+    db_dir = tempfile.mkdtemp(prefix='parkright-bench-')
+    app = create_app(make_config(os.path.join(db_dir, 'bench.db'), args.hash_workers, pragmas=not args.no_pragmas,
+                                 cache_enabled=not args.no_cache))
+    seed(app, args.lots, args.spots, args.users, args.history)
+    cache.reset_stats()
+    with app.app_context():
+        counter = SQLCounter(app, db.engine)
+        lot_ids = [lot_id for (lot_id,) in db.session.query(ParkingLot.id).all()]
+
+    emails = [f'bench{i}@example.com' for i in range(args.users)]
+    per_worker = args.requests // args.workers
+    workers = [
+        Worker(app, counter, emails[i::args.workers], lot_ids, per_worker, args.seed + i, args.mix)
+        for i in range(args.workers)
+    ]
+
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall_time = time.perf_counter() - started
+
+    with app.app_context():
+        get_hasher().shutdown()
+        db.engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    samples = [sample for worker in workers for sample in worker.samples]
+    endpoints = {}
+    for name in sorted({sample[0] for sample in samples}):
+        endpoints[name] = summarize([sample for sample in samples if sample[0] == name])
+
+    overall = summarize(samples)
+    overall['throughput_rps'] = round(len(samples) / wall_time, 1)
+    overall['wall_time_s'] = round(wall_time, 2)
+    overall['lock_errors'] = counter.lock_errors
+    overall['cache'] = cache.stats()['namespaces']
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'lots': args.lots,
+            'spots_per_lot': args.spots,
+            'users': args.users,
+            'history': args.history,
+            'workers': args.workers,
+            'operations': per_worker * args.workers,
+            'seed': args.seed,
+            'mix': args.mix,
+            'hash_workers': app.config['PASSWORD_HASH_WORKERS'],
+            'pragmas': not args.no_pragmas,
+            'cache': not args.no_cache,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'overall': overall,
+        'endpoints': endpoints,
+    }
+
+# Create a lot of `spots` spots, grow it to twice that and shrink it back,
+# through the admin lot form, `rounds` times. Reports the median time and
+# the SQL statements of each step.
+PROVISIONING_ROUNDS = 3
+
+def run_provisioning(args):
+    db_dir = tempfile.mkdtemp(prefix='parkright-bench-')
+    app = create_app(make_config(os.path.join(db_dir, 'bench.db'), args.hash_workers))
+    seed(app, 0, 0, 0)
+    with app.app_context():
+        counter = SQLCounter(app, db.engine)
+    admin = app.test_client()
+    admin.post('/login', data={'email': ADMIN_EMAIL, 'password': USER_PASSWORD})
+
+    def lot_form(name, spots):
+        return {'prime_location_name': name, 'address': '1 Benchmark Road', 'pin_code': '560001',
+                'price_per_hour': '30', 'max_spots': str(spots)}
+
+    steps = {'create': [], 'grow': [], 'shrink': []}
+    statements = {}
+
+    def timed(step, url, data):
+        counter.reset()
+        start = time.perf_counter()
+        response = admin.post(url, data=data)
+        steps[step].append(time.perf_counter() - start)
+        statements[step] = counter.statements
+        if response.status_code != 302:
+            raise RuntimeError(f'{step} failed with status {response.status_code}')
+
+    for round_number in range(PROVISIONING_ROUNDS):
+        name = f'Provisioning Lot {round_number}'
+        timed('create', '/admin/lots/create', lot_form(name, args.provisioning))
+        with app.app_context():
+            lot_id = db.session.execute(select(ParkingLot.id).where(ParkingLot.prime_location_name == name)).scalar()
+        timed('grow', f'/admin/lots/{lot_id}/edit', lot_form(name, args.provisioning * 2))
+        timed('shrink', f'/admin/lots/{lot_id}/edit', lot_form(name, args.provisioning))
+
+    with app.app_context():
+        get_hasher().shutdown()
+        db.engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'spots': args.provisioning,
+            'rounds': PROVISIONING_ROUNDS,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'provisioning': {
+            step: {
+                'median_ms': round(sorted(timings)[len(timings) // 2] * 1000, 3),
+                'statements': statements[step],
+            }
+            for step, timings in steps.items()
+        },
+    }
+
+# Claim every spot of one lot of args.allocation spots from args.workers
+# threads, one allocate_spot() and commit per claim, and check afterwards
+# that no spot was handed out twice and the counters still match the rows
+def run_allocation(args):
+    db_dir = tempfile.mkdtemp(prefix='parkright-bench-')
+    app = create_app(make_config(os.path.join(db_dir, 'bench.db'), args.hash_workers, pragmas=not args.no_pragmas))
+    seed(app, 1, args.allocation, 0)
+    with app.app_context():
+        counter = SQLCounter(app, db.engine)
+        lot_id = db.session.execute(select(ParkingLot.id)).scalar()
+
+    claimed = []
+    timings = []
+    gave_up = [0]
+    lock = threading.Lock()
+    start_line = threading.Barrier(args.workers)
+
+    def claim():
+        with app.app_context():
+            start_line.wait()
+            while True:
+                start = time.perf_counter()
+                spot_id = allocate_spot(lot_id)
+                db.session.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    if spot_id is not None:
+                        claimed.append(spot_id)
+                        timings.append(elapsed)
+                    elif len(claimed) < args.allocation:
+                        gave_up[0] += 1  # retries exhausted while spots were left
+                    if spot_id is None and len(claimed) >= args.allocation:
+                        break
+                    if gave_up[0] > args.allocation:
+                        raise RuntimeError('allocation keeps failing, giving up')
+            db.session.remove()
+
+    threads = [threading.Thread(target=claim, daemon=True) for _ in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - started
+
+    with app.app_context():
+        lot = db.session.get(ParkingLot, lot_id)
+        consistent = lot_counts(lot) == count_spots_by_status()[lot_id]
+        get_hasher().shutdown()
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(db_dir, ignore_errors=True)
+
+    timings.sort()
+    return {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'spots': args.allocation,
+            'workers': args.workers,
+            'sqlite_pragmas': not args.no_pragmas,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'allocation': {
+            'reservations': len(claimed),
+            'wall_time_s': round(wall_time, 3),
+            'reservations_per_s': round(len(claimed) / wall_time, 1) if wall_time else 0.0,
+            'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p95_ms': round(percentile(timings, 95) * 1000, 3),
+            'p99_ms': round(percentile(timings, 99) * 1000, 3),
+            'gave_up': gave_up[0],
+            'lock_errors': counter.lock_errors,
+            'duplicates': len(claimed) - len(set(claimed)),
+            'counters_consistent': consistent,
+        },
+    }
+
+def print_allocation_report(result):
+    stats = result['allocation']
+    print(f"{stats['reservations']} of {result['meta']['spots']} spots claimed by "
+          f"{result['meta']['workers']} threads in {stats['wall_time_s']}s "
+          f"({stats['reservations_per_s']} reservations/s)")
+    print(f"p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, p99 {stats['p99_ms']} ms")
+    print(f"{stats['gave_up']} gave up, {stats['lock_errors']} lock errors, "
+          f"{stats['duplicates']} duplicates, counters {'consistent' if stats['counters_consistent'] else 'DRIFTED'}")
+
+def print_provisioning_report(result):
+    spots = result['meta']['spots']
+    print(f"{'step':<40}{'median ms':>12}{'SQL':>8}")
+    for step, label in (('create', f'create lot of {spots} spots'),
+                        ('grow', f'grow {spots} -> {spots * 2}'),
+                        ('shrink', f'shrink {spots * 2} -> {spots}')):
+        stats = result['provisioning'][step]
+        print(f"{label:<40}{stats['median_ms']:>12}{stats['statements']:>8}")
+
+def print_report(result):
+    overall = result['overall']
+    print(f"{overall['count']} requests in {overall['wall_time_s']}s "
+          f"({overall['throughput_rps']} req/s), {overall['errors']} errors, "
+          f"{overall['lock_errors']} lock errors")
+    print(f"{'endpoint':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL/req':>9}{'render ms':>11}")
+    for name, stats in list(result['endpoints'].items()) + [('overall', overall)]:
+        print(f"{name:<20}{stats['count']:>7}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+              f"{stats['p99_ms']:>10}{stats['statements_per_request']:>9}{stats.get('render_ms', 0):>11}")
+    for namespace, stats in overall.get('cache', {}).items():
+        print(f"cache {namespace}: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_ratio'] * 100:.1f}% hit ratio)")
+
+# Compare against a saved baseline. A regression is p95 latency or
+# throughput worse by more than tolerance, more SQL per request, or new
+# lock errors. Returns the list of regressions.
+def compare(result, baseline, tolerance):
+    regressions = []
+    print(f"\n{'endpoint':<20}{'p95 ms':>18}{'SQL/req':>16}")
+    for name in sorted(set(result['endpoints']) | {'overall'}):
+        current = result['overall'] if name == 'overall' else result['endpoints'].get(name)
+        before = baseline['overall'] if name == 'overall' else baseline['endpoints'].get(name)
+        if current is None or before is None:
+            continue
+        print(f"{name:<20}{before['p95_ms']:>8} -> {current['p95_ms']:<8}"
+              f"{before['statements_per_request']:>6} -> {current['statements_per_request']:<6}")
+        if before['p95_ms'] and current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p95 {before["p95_ms"]} -> {current["p95_ms"]} ms')
+        if current['statements_per_request'] > before['statements_per_request'] + 0.5:
+            regressions.append(
+                f'{name}: SQL/request {before["statements_per_request"]} -> {current["statements_per_request"]}'
+            )
+
+    before, current = baseline['overall'], result['overall']
+    print(f"throughput: {before['throughput_rps']} -> {current['throughput_rps']} req/s")
+    if current['throughput_rps'] < before['throughput_rps'] * (1 - tolerance):
+        regressions.append(f'throughput {before["throughput_rps"]} -> {current["throughput_rps"]} req/s')
+    if current['lock_errors'] > before['lock_errors']:
+        regressions.append(f'lock errors {before["lock_errors"]} -> {current["lock_errors"]}')
+    return regressions
+
+# --mix dashboard=3,admin=1 -> {'dashboard': 3, 'admin': 1}
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in TRAFFIC_MIX:
+            raise argparse.ArgumentTypeError(f'unknown traffic kind {kind!r}, expected one of {", ".join(TRAFFIC_MIX)}')
+        try:
+            mix[kind] = int(weight or 1)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'weight of {kind} must be an integer')
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description='ParkRight load benchmark')
+    parser.add_argument('--lots', type=int, default=20)
+    parser.add_argument('--spots', type=int, default=50, help='spots per lot')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--history', type=int, default=0, help='closed reservations to seed')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent client threads')
+    parser.add_argument('--requests', type=int, default=2000, help='operations across all workers')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--mix', type=parse_mix, default=dict(TRAFFIC_MIX),
+                        help='traffic weights, e.g. dashboard=3,admin=1 (default: %s)' % ','.join(f'{k}={v}' for k, v in TRAFFIC_MIX.items()))
+    parser.add_argument('--hash-workers', type=int,
+                        help='password hashing processes, 0 to hash in the request thread (default: PASSWORD_HASH_WORKERS)')
+    parser.add_argument('--no-pragmas', action='store_true',
+                        help="use SQLite's default journal mode, synchronous and cache settings instead of config.py's")
+    parser.add_argument('--no-cache', action='store_true', help='run with CACHE_ENABLED off')
+    parser.add_argument('--provisioning', type=int, nargs='?', const=10000, metavar='SPOTS',
+                        help='time creating, growing and shrinking a lot of SPOTS spots (default 10000) instead of replaying traffic')
+    parser.add_argument('--allocation', type=int, nargs='?', const=10000, metavar='SPOTS',
+                        help='time --workers threads reserving every spot of a lot of SPOTS spots (default 10000) instead of replaying traffic')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown before a regression (0.2 = 20%%)')
+    args = parser.parse_args()
+    if args.users < args.workers:
+        parser.error('--users must be at least --workers')
+    if args.provisioning is not None and args.allocation is not None:
+        parser.error('--provisioning and --allocation are separate runs')
+    if (args.provisioning is not None or args.allocation is not None) and args.compare:
+        parser.error('--compare is not supported with --provisioning or --allocation')
+
+    if args.provisioning is not None:
+        result = run_provisioning(args)
+        print_provisioning_report(result)
+    elif args.allocation is not None:
+        result = run_allocation(args)
+        print_allocation_report(result)
+    else:
+        result = run_benchmark(args)
+        print_report(result)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print('\nRegressions:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+        print('\nNo regressions.')
+
+if __name__ == '__main__':
+    main()
@@ -4,3 +4,63 @@ class Config:
     SECRET_KEY = "dev-key" #replace with a secure key in production
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # connection pool used by every worker process
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+    }
+
+    # users cached by load_user; changes to a user evict it on commit
+    USER_CACHE_SIZE = 10000  # 0 disables the cache
+    USER_CACHE_TTL = 300  # seconds
+
+    # cache for lot availability shown on the dashboards; writes invalidate it on commit
+    CACHE_ENABLED = True
+    CACHE_BACKEND = 'memory'  # or 'redis' to share it between worker processes
+    CACHE_REDIS_URL = 'redis://localhost:6379/0'
+    CACHE_MAX_ENTRIES = 50000  # memory backend only, least recently used go first; Redis uses its own maxmemory policy
+    AVAILABILITY_CACHE_TTL = 5  # seconds, upper bound on staleness across processes
+    FRAGMENT_CACHE_TTL = 300  # seconds a rendered lot card is kept (see app/fragments.py)
+
+    # password hashing (see app/hashing.py); hashes made with other settings are upgraded on login
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'  # or e.g. 'pbkdf2:sha256:600000'; spell out every cost parameter
+    PASSWORD_SALT_LENGTH = 16
+    PASSWORD_HASH_WORKERS = 2  # processes that hash passwords; 0 hashes inline in the request worker
+    PASSWORD_HASH_MAX_PENDING = 16  # hashes queued or running at once
+    PASSWORD_HASH_QUEUE_TIMEOUT = 0.5  # seconds to wait for a slot before failing the login with a 503; keep it short so waiting logins do not hold request workers
+
+    # pricing rules used by app/billing.py
+    BILLING_MINIMUM_MINUTES = 1  # shorter sessions are billed as this long
+    BILLING_MINIMUM_CHARGE = 0.0
+    BILLING_PEAK_HOURS = None  # e.g. (8, 20) for a daily 08:00-20:00 peak window (UTC), or (22, 6) overnight
+    BILLING_PEAK_MULTIPLIER = 1.0
+    BILLING_OFF_PEAK_MULTIPLIER = 1.0
+
+    # reservations not occupied within RESERVATION_EXPIRY_MINUTES are expired and their spot freed
+    RESERVATION_EXPIRY_MINUTES = 30
+    RESERVATION_SWEEPER_ENABLED = True  # background thread of the server started by app.py; or run `flask sweep-reservations --loop`
+    RESERVATION_SWEEP_INTERVAL = 60  # seconds between sweeps
+
+    # nearby-lot search (see app/geo.py)
+    GEO_GRID_CELL_DEGREES = 0.05  # grid cell size, roughly 5.5 km
+    GEO_DEFAULT_RADIUS_KM = 5
+    GEO_MAX_RADIUS_KM = 50
+    GEO_INDEX_TTL = 5  # seconds; lots added or moved by other worker processes show up within this
+
+    # per-endpoint request metrics at /admin/metrics (see app/instrumentation.py)
+    INSTRUMENTATION_ENABLED = False
+    INSTRUMENTATION_QUERY_BUDGET = 20  # log requests running more SQL statements; None to disable
+    INSTRUMENTATION_SLOW_STATEMENTS = 5  # slowest statements kept per endpoint
+    METRICS_TOKEN = None  # bearer token for /admin/metrics/prometheus scrapes without a login
+
+    # SQLite PRAGMAs applied to every new connection (see app/database.py)
+    SQLITE_JOURNAL_MODE = 'WAL'
+    SQLITE_BUSY_TIMEOUT = 5000  # ms to wait for a lock before "database is locked"
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # safe with WAL, far fewer fsyncs than FULL
+    SQLITE_CACHE_SIZE = -64000  # negative means KiB, so 64 MB of page cache
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+    # send read-only queries (dashboards, exports) to a separate read-only connection pool
+    SQLITE_READ_ONLY_CONNECTION = False
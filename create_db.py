@@ -1,13 +1,21 @@
+import sys
 from app import create_app, db
 from app.models import User, ParkingLot, ParkingSpot, Reservation
+from app.migrations import upgrade_schema
+from app.availability import reconcile_counters
 from werkzeug.security import generate_password_hash
-from sqlalchemy import inspect
 
 app = create_app()
 
 with app.app_context():
-    db.drop_all()
-    db.create_all()
+    # pass --reset to wipe all data and start from an empty schema
+    if '--reset' in sys.argv:
+        db.drop_all()
+        print("Dropped all tables.")
+
+    for change in upgrade_schema():
+        print(change)
+    reconcile_counters()
     
     existing_admin = User.query.filter_by(email='admin@vpapp.com').first()
     if not existing_admin:
@@ -0,0 +1,56 @@
+import pytest
+from werkzeug.security import generate_password_hash
+from config import Config
+from app import create_app, db
+from app.models import User, ParkingLot
+from app.migrations import upgrade_schema
+from app.provisioning import add_spots
+
+PASSWORD = 'test-password'
+
+def make_config(db_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(db_path)
+        RESERVATION_SWEEPER_ENABLED = False
+        # hash inline and cheaply; the pool and cost are not under test here
+        PASSWORD_HASH_WORKERS = 0
+        PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    return TestConfig
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app(make_config(tmp_path / 'test.db'))
+    with app.app_context():
+        upgrade_schema()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def create_user(email, is_admin=False):
+    user = User(
+        email=email,
+        full_name=email.split('@')[0],
+        password=generate_password_hash(PASSWORD, 'pbkdf2:sha256:1000'),
+        is_admin=is_admin
+    )
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def create_lot(spots, name='Test Lot'):
+    lot = ParkingLot(
+        prime_location_name=name, address='1 Test Road', pin_code='560001',
+        price_per_hour=30.0, max_spots=spots
+    )
+    db.session.add(lot)
+    db.session.flush()
+    add_spots(lot.id, spots)
+    return lot
+
+def login(app, email):
+    client = app.test_client()
+    response = client.post('/login', data={'email': email, 'password': PASSWORD})
+    assert response.status_code == 302
+    return client
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import db
+from app.models import ParkingSpot, Reservation
+from tests.conftest import create_lot, create_user, login
+
+def count_statements(app, client, url):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    return len(statements)
+
+# Users with past sessions and, for every third one, an open reservation,
+# so the page has lots and history to look up for each row
+def seed_users(first, count):
+    lot = create_lot(count)
+    spot_ids = db.session.query(ParkingSpot.id).filter_by(lot_id=lot.id).order_by(ParkingSpot.id).all()
+    now = datetime.utcnow()
+    for i in range(first, first + count):
+        user = create_user(f'user{i}@example.com')
+        spot_id = spot_ids[i - first][0]
+        db.session.add(Reservation(
+            user_id=user.id, spot_id=spot_id, parking_timestamp=now - timedelta(hours=2),
+            leaving_timestamp=now - timedelta(hours=1), cost=30.0
+        ))
+        if i % 3 == 0:
+            db.session.add(Reservation(user_id=user.id, spot_id=spot_id, parking_timestamp=now))
+    db.session.commit()
+
+def test_user_list_runs_a_constant_number_of_queries(app):
+    with app.app_context():
+        create_user('admin@example.com', is_admin=True)
+        seed_users(0, 1)
+    admin = login(app, 'admin@example.com')
+    admin.get('/admin/users')  # warm the user cache
+    one_user = count_statements(app, admin, '/admin/users')
+
+    with app.app_context():
+        seed_users(1, 199)
+    two_hundred_users = count_statements(app, admin, '/admin/users')
+    searched = count_statements(app, admin, '/admin/users?q=user1')
+
+    assert one_user == two_hundred_users
+    assert searched == one_user
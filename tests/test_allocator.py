@@ -0,0 +1,49 @@
+import threading
+from app import db
+from app.allocator import allocate_spot
+from app.availability import count_spots_by_status, lot_counts
+from app.models import ParkingLot
+from tests.conftest import create_lot
+
+THREADS = 16
+CLAIMS_PER_THREAD = 5
+
+def test_concurrent_allocation_never_hands_out_a_spot_twice(app):
+    with app.app_context():
+        # fewer spots than claims, so the threads also race for the last ones
+        lot_id = create_lot(THREADS * CLAIMS_PER_THREAD - 10).id
+        db.session.commit()
+
+    granted = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def claim():
+        with app.app_context():
+            start.wait()
+            try:
+                for _ in range(CLAIMS_PER_THREAD):
+                    spot_id = allocate_spot(lot_id)
+                    db.session.commit()
+                    if spot_id is not None:
+                        with lock:
+                            granted.append(spot_id)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.session.remove()
+
+    threads = [threading.Thread(target=claim) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert granted
+    assert len(granted) == len(set(granted))
+    with app.app_context():
+        actual = count_spots_by_status()[lot_id]
+        assert actual['R'] == len(granted)
+        assert lot_counts(db.session.get(ParkingLot, lot_id)) == actual
@@ -0,0 +1,34 @@
+from datetime import datetime
+import pytest
+from app.billing import compute_cost
+
+def rules(peak_hours, peak=2.0, off_peak=1.0):
+    return {
+        'minimum_minutes': 1,
+        'minimum_charge': 0.0,
+        'peak_hours': peak_hours,
+        'peak_multiplier': peak,
+        'off_peak_multiplier': off_peak,
+    }
+
+@pytest.mark.parametrize('start, end, expected', [
+    # 2h entirely in an 08:00-20:00 peak
+    (datetime(2024, 1, 1, 9), datetime(2024, 1, 1, 11), 120.0),
+    # 19:00-21:00: one peak hour, one off-peak hour
+    (datetime(2024, 1, 1, 19), datetime(2024, 1, 1, 21), 90.0),
+])
+def test_daytime_peak(start, end, expected):
+    assert compute_cost(start, end, 30.0, rules((8, 20))) == expected
+
+@pytest.mark.parametrize('start, end, expected', [
+    # 23:00-01:00 crosses midnight inside a 22:00-06:00 peak
+    (datetime(2024, 1, 1, 23), datetime(2024, 1, 2, 1), 120.0),
+    # 05:00-07:00: one peak hour before 06:00, one off-peak hour after
+    (datetime(2024, 1, 2, 5), datetime(2024, 1, 2, 7), 90.0),
+    # 12:00-14:00 is off-peak
+    (datetime(2024, 1, 2, 12), datetime(2024, 1, 2, 14), 60.0),
+    # 20:00-08:00: 8 peak hours and 4 off-peak hours
+    (datetime(2024, 1, 1, 20), datetime(2024, 1, 2, 8), 600.0),
+])
+def test_overnight_peak(start, end, expected):
+    assert compute_cost(start, end, 30.0, rules((22, 6))) == expected
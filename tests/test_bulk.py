@@ -0,0 +1,53 @@
+from sqlalchemy import event
+from app import db
+from app.availability import count_spots_by_status, lot_counts
+from app.bulk import release_spots
+from app.models import ParkingLot, ParkingSpot, Reservation, UserLotStats
+from app.parking import occupy_spot, reserve_spot
+from tests.conftest import create_lot, create_user
+
+def test_bulk_release_closes_reserved_and_occupied_spots(app):
+    with app.app_context():
+        lot_id = create_lot(5).id
+        parked = create_user('parked@example.com')
+        waiting = create_user('waiting@example.com')
+        occupied = reserve_spot(parked, lot_id)
+        db.session.flush()
+        occupy_spot(occupied, parked)
+        reserved = reserve_spot(waiting, lot_id)
+        db.session.commit()
+        spot_ids = [s.id for s in ParkingSpot.query.filter_by(lot_id=lot_id).order_by(ParkingSpot.id)]
+
+        statements = []
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('UPDATE reservations'):
+                statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', capture)
+        try:
+            report = release_spots(lot_id, spot_ids)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+        # only the closing columns are written
+        assert len(statements) == 1
+        assert 'parking_timestamp=' not in statements[0] and 'user_id=' not in statements[0]
+
+        results = {row['spot_id']: (row['result'], row['detail']) for row in report}
+        assert results[occupied.spot_id][0] == 'released'
+        assert results[reserved.spot_id] == ('released', 'reservation cancelled')
+        assert [row['result'] for row in report].count('skipped') == 3
+
+        db.session.expire_all()
+        assert all(spot.status == 'A' for spot in ParkingSpot.query.filter_by(lot_id=lot_id))
+        assert Reservation.query.filter_by(leaving_timestamp=None).count() == 0
+        cancelled = db.session.get(Reservation, reserved.id)
+        assert cancelled.parking_timestamp is None and cancelled.user_id == waiting.id
+        assert cancelled.cost == 0 and cancelled.duration_seconds is None
+        assert cancelled.duration == 'N/A'
+        # only the billed session counts towards the user totals
+        assert [stats.user_id for stats in UserLotStats.query.all()] == [parked.id]
+
+        lot = db.session.get(ParkingLot, lot_id)
+        assert lot_counts(lot) == count_spots_by_status()[lot_id]
+        assert lot_counts(lot)['A'] == 5
@@ -0,0 +1,29 @@
+from app.cache import MemoryBackend
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=3)
+    backend.set_many({'a': 1, 'b': 2, 'c': 3}, ttl=60)
+    assert backend.get('a') == 1  # 'b' is now the least recently used
+    backend.set('d', 4, ttl=60)
+
+    assert backend.get_many(['a', 'b', 'c', 'd']) == [1, None, 3, 4]
+    assert len(backend) == 3
+
+def test_memory_backend_sweeps_expired_entries(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('app.cache.time.monotonic', lambda: clock[0])
+    backend = MemoryBackend(max_entries=100)
+    for version in range(50):
+        backend.set(f'fragment:card:1:{version}:', 'html', ttl=300)
+
+    clock[0] += 301
+    backend.set('fragment:card:1:50:', 'html', ttl=300)
+    assert len(backend) == 1
+
+def test_memory_backend_never_evicts_counters():
+    backend = MemoryBackend(max_entries=2)
+    assert backend.incr('availability:version:1') == 1
+    backend.set_many({f'fragment:{i}': i for i in range(10)}, ttl=60)
+
+    assert backend.get('availability:version:1') == 1
+    assert backend.incr('availability:version:1') == 2
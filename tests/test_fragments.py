@@ -0,0 +1,31 @@
+import re
+from sqlalchemy import update
+from app import db
+from app.availability import LOTS_CACHE_KEY
+from app.cache import cache
+from app.models import ParkingLot
+from tests.conftest import create_lot, create_user, login
+
+def spot_counts(response):
+    return re.findall(rb'(\d+) / (\d+) Spots', response.data)
+
+def test_card_follows_a_change_made_by_another_process(app):
+    with app.app_context():
+        lot_id = create_lot(10).id
+        create_user('driver@example.com')
+        db.session.commit()
+    client = login(app, 'driver@example.com')
+    assert spot_counts(client.get('/user/dashboard')) == [(b'10', b'10')]
+
+    with app.app_context():
+        # another worker's change: it never touches this process's cache
+        db.session.execute(
+            update(ParkingLot).where(ParkingLot.id == lot_id)
+            .values(available_spots=9, reserved_spots=1)
+        )
+        db.session.info.clear()
+        db.session.commit()
+        # ... until the snapshot expires after AVAILABILITY_CACHE_TTL
+        cache.delete(LOTS_CACHE_KEY)
+
+    assert spot_counts(client.get('/user/dashboard')) == [(b'9', b'10')]
@@ -0,0 +1,32 @@
+from app import db
+from app.availability import invalidate_availability
+from app.geo import geo_index, search_lots
+from app.models import ParkingLot
+from tests.conftest import create_lot
+
+def add_lot(name, lat, lon):
+    lot = create_lot(4, name=name)
+    lot.latitude, lot.longitude = lat, lon
+    return lot
+
+def test_index_picks_up_lots_added_by_another_process(app, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('app.geo.time.monotonic', lambda: clock[0])
+    geo_index.mark_stale()
+    with app.app_context():
+        add_lot('First', 12.97, 77.59)
+        db.session.commit()
+        assert [lot['prime_location_name'] for lot in search_lots(12.97, 77.59)] == ['First']
+
+        # another worker's insert: nothing marks this process's index stale
+        db.session.add(ParkingLot(
+            prime_location_name='Second', address='2 Test Road', pin_code='560001',
+            price_per_hour=30.0, max_spots=4, available_spots=4, latitude=12.98, longitude=77.59
+        ))
+        db.session.commit()
+        invalidate_availability()
+        assert len(search_lots(12.97, 77.59)) == 1
+
+        clock[0] += app.config['GEO_INDEX_TTL']
+        names = [lot['prime_location_name'] for lot in search_lots(12.97, 77.59)]
+        assert names == ['First', 'Second']
@@ -0,0 +1,35 @@
+import os
+import time
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import check_password_hash
+from app.hashing import HashingBusy, PasswordHasher
+
+METHOD = 'pbkdf2:sha256:1000'
+
+def test_broken_pool_is_replaced_and_the_hash_retried():
+    hasher = PasswordHasher(METHOD, workers=1)
+    try:
+        broken = hasher._get_executor()
+        # a pool process dying breaks the whole pool
+        with pytest.raises(BrokenProcessPool):
+            broken.submit(os._exit, 1).result()
+
+        password_hash = hasher.hash('secret')
+
+        assert check_password_hash(password_hash, 'secret')
+        assert hasher._executor is not broken
+    finally:
+        hasher.shutdown()
+
+def test_full_queue_fails_fast():
+    hasher = PasswordHasher(METHOD, workers=1, max_pending=1)
+    hasher._slots.acquire()
+    try:
+        started = time.monotonic()
+        with pytest.raises(HashingBusy):
+            hasher.hash('secret')
+        assert time.monotonic() - started < 2
+    finally:
+        hasher._slots.release()
+        hasher.shutdown()
@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+from sqlalchemy import select, text
+from app import create_app, db
+from app.migrations import upgrade_schema
+from app.models import ParkingSpot, Reservation
+from tests.conftest import make_config
+
+# The schema as created by the first release, before any index or counter
+# column existed
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL, email VARCHAR(120) NOT NULL, full_name VARCHAR(100) NOT NULL,
+    password VARCHAR(200) NOT NULL, is_admin BOOLEAN,
+    PRIMARY KEY (id), UNIQUE (email)
+);
+CREATE TABLE parking_lots (
+    id INTEGER NOT NULL, prime_location_name VARCHAR(100) NOT NULL, price_per_hour FLOAT NOT NULL,
+    address VARCHAR(200) NOT NULL, pin_code VARCHAR(10) NOT NULL, max_spots INTEGER NOT NULL,
+    PRIMARY KEY (id)
+);
+CREATE TABLE parking_spots (
+    id INTEGER NOT NULL, lot_id INTEGER NOT NULL, status VARCHAR(1) NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(lot_id) REFERENCES parking_lots (id)
+);
+CREATE TABLE reservations (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, spot_id INTEGER NOT NULL,
+    parking_timestamp DATETIME, leaving_timestamp DATETIME, cost FLOAT,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES users (id), FOREIGN KEY(spot_id) REFERENCES parking_spots (id)
+);
+INSERT INTO users VALUES (1, 'old@example.com', 'Old User', 'x', 0);
+INSERT INTO parking_lots VALUES (1, 'Old Lot', 30.0, '1 Old Road', '560001', 2);
+INSERT INTO parking_spots VALUES (1, 1, 'O'), (2, 1, 'A');
+INSERT INTO reservations VALUES (1, 1, 1, '2024-01-01 10:00:00', NULL, NULL);
+"""
+
+# hot lookups -> the index each one must be served by
+HOT_QUERIES = [
+    (
+        select(Reservation.id).where(Reservation.user_id == 1, Reservation.leaving_timestamp == None),
+        'ix_reservations_user_id_leaving_timestamp',
+    ),
+    (
+        select(Reservation.id).where(Reservation.spot_id == 1, Reservation.leaving_timestamp == None),
+        'ix_reservations_spot_id_leaving_timestamp',
+    ),
+    (
+        select(ParkingSpot.id).where(ParkingSpot.lot_id == 1, ParkingSpot.status == 'A').limit(1),
+        'ix_parking_spots_lot_id_status',
+    ),
+]
+
+@pytest.fixture
+def baseline_app(tmp_path):
+    db_path = tmp_path / 'baseline.db'
+    connection = sqlite3.connect(db_path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.close()
+
+    app = create_app(make_config(db_path))
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def query_plan(stmt):
+    sql = str(stmt.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+
+@pytest.mark.parametrize('stmt, index_name', HOT_QUERIES)
+def test_upgraded_baseline_uses_index(baseline_app, stmt, index_name):
+    with baseline_app.app_context():
+        changes = upgrade_schema()
+        assert f'created index {index_name}' in changes
+        # EXPLAIN does not read the schema cookie, so a pooled connection
+        # that predates the upgrade would plan against the old schema
+        db.engine.dispose()
+
+        plan = query_plan(stmt)
+        assert any(index_name in step for step in plan), plan
+        assert not any(step.startswith('SCAN') for step in plan), plan
+
+def test_upgrade_keeps_existing_rows(baseline_app):
+    with baseline_app.app_context():
+        upgrade_schema()
+        reservation = db.session.get(Reservation, 1)
+        assert reservation.spot_id == 1
+        # backfilled from parking_timestamp
+        assert reservation.created_at == reservation.parking_timestamp
+        # a second run has nothing left to do
+        assert upgrade_schema() == []
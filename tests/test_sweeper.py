@@ -0,0 +1,43 @@
+import threading
+from datetime import datetime, timedelta
+from app import create_app, db
+from app.models import ParkingSpot, Reservation
+from app.parking import reserve_spot
+from app.sweeper import expire_stale_reservations, start_sweeper
+from tests.conftest import create_lot, create_user, make_config
+
+def sweeper_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'reservation-sweeper' and thread.is_alive()]
+
+def test_sweeper_only_starts_when_asked(tmp_path):
+    class ServingConfig(make_config(tmp_path / 'test.db')):
+        TESTING = False
+        RESERVATION_SWEEPER_ENABLED = True
+
+    app = create_app(ServingConfig)
+    assert 'reservation_sweeper' not in app.extensions
+    assert sweeper_threads() == []
+
+    sweeper = start_sweeper(app)
+    try:
+        assert sweeper is not None
+        assert start_sweeper(app) is sweeper
+        assert len(sweeper_threads()) == 1
+    finally:
+        sweeper.stop()
+
+def test_expired_reservation_has_no_duration(app):
+    with app.app_context():
+        lot_id = create_lot(2).id
+        reservation = reserve_spot(create_user('late@example.com'), lot_id)
+        db.session.flush()
+        reservation.created_at = datetime.utcnow() - timedelta(minutes=30)
+        db.session.commit()
+
+        assert expire_stale_reservations(15) == 1
+
+        db.session.expire_all()
+        expired = db.session.get(Reservation, reservation.id)
+        assert expired.is_expired
+        assert expired.duration_seconds is None and expired.duration == 'N/A'
+        assert db.session.get(ParkingSpot, expired.spot_id).status == 'A'